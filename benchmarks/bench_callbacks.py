@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+"""Callback latency, peak memory, response size and start-up time against scaled data.
+
+Run from the repository root:
+
+    python benchmarks/bench_callbacks.py
+    python benchmarks/bench_callbacks.py --scales 1 10 --output bench.json --baseline main.json
+
+For each scale a synthetic csv is written to a temporary folder: every AEO
+edition of the benchmark csv is repeated `scale` times under new edition
+years with jittered values, so rows and editions both grow `scale` times.
+The app is then imported in fresh interpreters pointed at that folder, once
+without the columnar cache (cold start) and once with it (warm start). The
+warm interpreter calls the line and scatter callbacks directly over a matrix
+of indicators, case selections and year ranges, and requests the figure
+templates that the theme switch fetches (it runs in the browser since the
+templates are served as json, see utils.templates).
+
+Every measurement is written as one record to the json file given by
+--output; with --baseline the printed table adds the ratio to the matching
+record of an earlier run, so a slower or larger hot path stands out in review.
+The 100x scale alone takes a quarter of an hour, mostly in the scatter chart.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC))
+
+from utils.locator import find_data_file
+
+
+DATA_FILE = "eia-aeo-mer-benchmark-nov2024.csv"
+
+INDICATORS = ["PRCE_NA_NA_NA_CR_IMCO_USA_RDLRPBRL", "EMI_CO2_NA_NA_NA_NA_NA_MILLMTCO2EQ"]
+CASE_SELECTIONS = {
+    "one": ["REFERENCE"],
+    "three": ["REFERENCE", "ACTUAL", "HIGHMACRO"],
+    "all": None,  # every case in the data
+}
+YEAR_RANGES = {"decade": [2020, 2030], "full": None}  # None is the full range of the data
+THEMES = ["lux", "lux_dark", "darkly"]
+
+
+def make_scaled_csv(source: Path, target: Path, scale: int, seed: int = 0):
+    # copy k of edition e becomes edition e + 100 * k, so string order and the
+    # scatter chart's edition >= "2023" filter keep working on the copies
+    df = pd.read_csv(source)
+    values = [c for c in df.columns if pd.api.types.is_float_dtype(df[c])]
+    rng = np.random.default_rng(seed)
+    copies = [df]
+    for k in range(1, scale):
+        copy = df.copy()
+        copy["edition"] = copy["edition"].astype(int) + 100 * k
+        copy[values] = copy[values] * rng.uniform(0.9, 1.1, size=(len(copy), len(values)))
+        copies.append(copy)
+    pd.concat(copies, ignore_index=True).to_csv(target, index=False)
+
+
+def response_size(output) -> dict:
+    from plotly.utils import PlotlyJSONEncoder
+
+    data = json.dumps(output, cls=PlotlyJSONEncoder).encode()
+    return {"bytes": len(data), "gzip_bytes": len(zlib.compress(data, 6))}
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def peak_kb(func) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_callbacks() -> list:
+    # runs in the warm interpreter, after `import app`
+    import dash_bootstrap_components as dbc
+    import app
+    from utils.figure_cache import FigureCache
+
+    data = app.data_manager.current
+    years = [int(data.years[0]), int(data.years[-1])]
+    theme = dbc.themes.LUX
+    callbacks = {
+        "update": lambda ind, cases, yrs: app.update(ind, cases, "tab-line", yrs, None, theme, True),
+        "update_scatter": lambda ind, cases, yrs: app.update_scatter(ind, cases, yrs, "tab-scatter", None, theme, True),
+    }
+
+    records = []
+    for name, call in callbacks.items():
+        for indicator in INDICATORS:
+            for cases_name, cases in CASE_SELECTIONS.items():
+                for years_name, yrs in YEAR_RANGES.items():
+                    args = (indicator, cases or data.case_names, yrs or years)
+                    # each case starts from an empty in-memory figure cache, so the first
+                    # call builds the figure and the second is served by the cache
+                    data.figure_cache = FigureCache()
+                    output, wall_ms = timed(lambda: call(*args))
+                    _, cached_ms = timed(lambda: call(*args))
+
+                    # peak memory of a build, measured separately since tracing slows it down
+                    data.figure_cache = FigureCache()
+                    peak = peak_kb(lambda: call(*args))
+
+                    records.append({"callback": name, "indicator": indicator, "cases": cases_name,
+                                    "years": years_name, "wall_ms": wall_ms, "cached_ms": cached_ms,
+                                    "peak_kb": peak, **response_size(output[0])})
+                    # progress, the larger scales take minutes
+                    print(f"{name} {indicator} {cases_name} {years_name}: {wall_ms:.0f} ms", file=sys.stderr, flush=True)
+
+    client = app.app.server.test_client()
+    for theme_name in THEMES:
+        url = app.app.get_relative_path(f"/templates/{theme_name}.json")
+        response, wall_ms = timed(lambda: client.get(url))
+        _, cached_ms = timed(lambda: client.get(url))
+        revalidated, revalidate_ms = timed(lambda: client.get(url, headers={"If-None-Match": response.headers["ETag"]}))
+        records.append({"callback": "template", "theme": theme_name, "wall_ms": wall_ms, "cached_ms": cached_ms,
+                        "revalidate_ms": revalidate_ms, "revalidate_status": revalidated.status_code,
+                        "bytes": len(response.data), "gzip_bytes": len(zlib.compress(response.data, 6))})
+    return records
+
+
+def worker(measure_callbacks: bool):
+    # one fresh interpreter per start, so the import is really cold
+    start = time.perf_counter()
+    import app
+    import_ms = (time.perf_counter() - start) * 1e3
+
+    data = app.data_manager.current
+    result = {"import_ms": import_ms, "rows": len(data.df), "editions": int(data.df.edition.nunique())}
+    if measure_callbacks:
+        result["callbacks"] = run_callbacks()
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["max_rss_kb"] = maxrss / 1024 if sys.platform == "darwin" else maxrss
+    print(json.dumps(result))
+
+
+def run_worker(folder: Path, measure_callbacks: bool) -> dict:
+    env = dict(os.environ,
+               DASH_BENCHMARK_DATA=str(folder),
+               DASH_BENCHMARK_FIGURE_CACHE=str(folder / "figures"),
+               DASH_BENCHMARK_RELOAD_INTERVAL="0")
+    args = [sys.executable, __file__, "--worker"] + (["--callbacks"] if measure_callbacks else [])
+    out = subprocess.run(args, cwd=SRC, env=env, stdout=subprocess.PIPE, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure(scale: int, source: Path) -> list:
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        make_scaled_csv(source, folder / DATA_FILE, scale)
+
+        cold = run_worker(folder, measure_callbacks=False)
+        warm = run_worker(folder, measure_callbacks=True)
+
+    common = {"scale": scale, "rows": warm["rows"], "editions": warm["editions"]}
+    records = [{**common, "callback": "import", "start": "cold", "wall_ms": cold["import_ms"], "max_rss_kb": cold["max_rss_kb"]},
+               {**common, "callback": "import", "start": "warm", "wall_ms": warm["import_ms"], "max_rss_kb": warm["max_rss_kb"]}]
+    return records + [{**common, **record} for record in warm["callbacks"]]
+
+
+def record_id(record: dict) -> tuple:
+    return tuple(record.get(k) for k in ("scale", "callback", "start", "theme", "indicator", "cases", "years"))
+
+
+def print_table(records: list, baseline: list = None):
+    previous = {record_id(r): r for r in baseline or []}
+    print(f"{'scale':>5} {'callback':<15} {'case':<56} {'ms':>9} {'cached':>8} {'peak KB':>9} {'bytes':>9}"
+          + (f" {'vs base':>8}" if baseline else ""))
+    for r in records:
+        case = " ".join(str(r[k]) for k in ("start", "theme", "indicator", "cases", "years") if k in r)
+        line = (f"{r['scale']:>5} {r['callback']:<15} {case:<56} {r['wall_ms']:>9.1f} "
+                f"{r.get('cached_ms', float('nan')):>8.2f} {r.get('peak_kb', float('nan')):>9.0f} "
+                f"{r.get('bytes', 0):>9}")
+        old = previous.get(record_id(r))
+        if old:
+            line += f" {r['wall_ms'] / old['wall_ms']:>7.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--output", type=Path, default=Path("bench_callbacks.json"))
+    parser.add_argument("--baseline", type=Path, help="results of an earlier run to compare with")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--callbacks", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args.callbacks)
+
+    source = find_data_file(DATA_FILE)
+    records = []
+    for scale in args.scales:
+        records += measure(scale, source)
+
+    args.output.write_text(json.dumps({
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "source": source.name,
+        "records": records,
+    }, indent=1))
+    baseline = json.loads(args.baseline.read_text())["records"] if args.baseline else None
+    print_table(records, baseline)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
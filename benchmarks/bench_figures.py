@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""Line chart build time for all AEO editions, before and after single-pass trace styling.
+
+Run from the repository root:
+
+    python benchmarks/bench_figures.py
+
+"before" is the px.line + for_each_trace + per-edition update_traces chain the
+app used to run; "after" is utils.figures.line_figure. Both build the same
+figure from a synthetic selection with every edition from 2005 to 2025.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+from dash_bootstrap_templates import load_figure_template
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from utils.constants import colors_dict, edition_colors_dict
+from utils.figures import line_figure
+
+
+INDICATOR = "PRCE_NA_NA_NA_CR_IMCO_USA_RDLRPBRL"
+TEMPLATE = "lux"
+
+
+def make_selection(n_cases: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    rows = []
+    for edition in range(2005, 2026):
+        for case in ["Reference case", "High Economic Growth", "Low Economic Growth",
+                     "High Oil Price", "Low Oil Price"][:n_cases]:
+            for year in range(edition - 1, 2051):
+                rows.append((str(edition), case, year))
+    dff = pd.DataFrame(rows, columns=["edition", "case_name_labels", "year"])
+    dff[INDICATOR] = rng.uniform(20, 120, len(dff))
+    return dff
+
+
+def legacy_line_figure(dff: pd.DataFrame, title: str):
+    fig = px.line(dff.sort_values(by=["edition","case_name_labels"],ascending=True), x="year", y=INDICATOR,
+                  color="edition", line_group="case_name_labels",
+                  labels={"edition": "edition", "case_name_labels": "case"}, title=title, template=TEMPLATE)
+    fig.for_each_trace(
+        lambda trace: trace.update(line_color="black", line_width=4) if trace.legendgroup == "2024" else (),)
+    fig.update_layout(yaxis=dict(title=None, tickfont_size=26), xaxis=dict(tickfont_size=26, automargin=True),
+                      legend=dict(font=dict(size=26,)), title=dict(font=dict(size=26)),
+                      paper_bgcolor='rgba(0, 0, 0, 0)', plot_bgcolor='rgba(0, 0, 0, 0)',
+                      modebar=dict(orientation='h', bgcolor='#ffffff', color='red', activecolor='red'))
+    fig.update_layout(yaxis=dict(tickprefix= '$', separatethousands= True, tickfont_size=26))
+    fig.update_xaxes(mirror=False, ticks='outside', showline=True, linecolor='black', linewidth=2,
+                     gridcolor='lightgrey', title_font = {"size": 26}, title_standoff = 1)
+    fig.update_yaxes(mirror=True, ticks=None, showline=False, linecolor='black', gridcolor='lightgrey')
+    for edition, color in edition_colors_dict.items():
+        fig.update_traces(selector=dict(legendgroup=edition), line=dict(color=colors_dict.get(color)))
+    return fig
+
+
+def best_of(func, repeat: int = 7) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    load_figure_template(TEMPLATE)
+    # line_figure takes the template itself, as the app gets it from its TemplateRegistry
+    template = pio.templates[TEMPLATE]
+    print(f"{'cases':>6} {'traces':>7} {'before (ms)':>12} {'after (ms)':>11} {'speed-up':>9}")
+    for n_cases in (1, 3, 5):
+        dff = make_selection(n_cases)
+        before = best_of(lambda: legacy_line_figure(dff, "title"))
+        after = best_of(lambda: line_figure(dff, INDICATOR, "title", template))
+        n_traces = len(line_figure(dff, INDICATOR, "title", template).data)
+        print(f"{n_cases:>6} {n_traces:>7} {before * 1e3:>12.1f} {after * 1e3:>11.1f} {before / after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""Start-up cost of locating the benchmark csv as unrelated files are added to the tree.
+
+Run from the repository root:
+
+    python benchmarks/bench_locator.py
+
+For each tree size the legacy recursive ``find_files`` walk is compared with
+``find_data_file`` on a cold start (no manifest) and a warm start (manifest
+from the previous start).
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from utils.constants import find_files
+from utils.locator import find_data_file
+
+
+DATA_FILE = "eia-aeo-mer-benchmark-nov2024.csv"
+
+
+def make_tree(root: Path, n_files: int):
+    (root / "data").mkdir()
+    (root / "data" / DATA_FILE).write_text("edition,case_name,year\n")
+    # unrelated files spread over a deep folder and the folders the locator prunes
+    for i in range(n_files):
+        folder = root / ["notebooks", ".git", "assets"][i % 3] / f"{i % 50}" / f"{i % 7}"
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"file_{i}.txt").touch()
+
+
+def best_of(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'files':>8} {'find_files (ms)':>16} {'cold (ms)':>10} {'warm (ms)':>10}")
+    for n_files in (0, 1_000, 10_000, 50_000):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            make_tree(root, n_files)
+            manifest = root / "manifest.json"
+
+            legacy = best_of(lambda: list(find_files(DATA_FILE, root)), repeat=1 if n_files else 5)
+
+            def cold():
+                manifest.unlink(missing_ok=True)
+                find_data_file(DATA_FILE, roots=[root], manifest=manifest)
+
+            cold_time = best_of(cold)
+            warm_time = best_of(lambda: find_data_file(DATA_FILE, roots=[root], manifest=manifest))
+            print(f"{n_files:>8} {legacy * 1e3:>16.2f} {cold_time * 1e3:>10.2f} {warm_time * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,101 +1,112 @@
 # -*- coding: utf-8 -*-
 
-from dash import Dash, dcc, html, Input, Output, State, callback, Patch, clientside_callback
+from dash import Dash, dcc, html, Input, Output, State, callback, clientside_callback, ClientsideFunction, no_update
 import dash_ag_grid as dag
 from dash_bootstrap_templates import ThemeChangerAIO, template_from_url
 import dash_bootstrap_components as dbc
 import pandas as pd
 from pathlib import Path
+import logging
+import os
 import plotly.express as px
-import plotly.io as pio
-import plotly.graph_objs as go
 import numpy as np
-
-from utils.constants import (meta_tags, 
-                             find_files, 
-                             format_title,  
-                             units_dict, 
-                             titles_dict, 
-                             case_name_labels_dict, 
-                             colors_dict,
-                             sources_dict)
-
-import gc
+from types import SimpleNamespace
+
+from utils.constants import meta_tags, indicators
+from utils.cube import BenchmarkCube
+from utils.compact import compact_mode, compact_figure, register_response_compression
+from utils.data_manager import DataManager, latest_data_file
+from utils.data_store import load_benchmark_data, data_version
+from utils.derived import GDP_PER_CAPITA, decimals_for, is_derived, title_for, units_for, source_for
+from utils.export import register_export_route
+from utils.figure_cache import FigureCache, FIGURE_CACHE_ENV, default_cache_dir, to_plain
+from utils.figures import error_figure, figure_patch, line_figure, small_multiples, with_year_range
+from utils.forecast_errors import ForecastErrors, error_metrics
+from utils.grid_rows import GridRowModel
+from utils.locator import find_data_file
+from utils.metrics import CallbackMetrics, register_metrics_route
+from utils.offload import BuildPool, Superseded
+from utils.schema import memory_report
+from utils.series_index import SeriesIndex
+from utils.templates import TemplateRegistry, default_theme_url, register_template_route, theme_changer
+from utils.warmup import CacheWarmer
+
+import random
+import uuid
+from concurrent.futures.process import BrokenProcessPool
 
 
 work_dir = Path.cwd()
 
+# the size of each loaded frame is logged at info level (see utils.schema.memory_report)
+logger = logging.getLogger(__name__)
+
 # Uncomment below line out to check your working directory
 #print(work_dir)
 
-for path in find_files("eia-aeo-mer-benchmark-nov2024.csv", Path(".")):
-    dashboard_data_path = path
-
-    
-# we setup the data but use find_files to locate the correct input data file
-df = pd.read_csv(dashboard_data_path)
-
-df['edition'] = df['edition'].astype(str)
-df = df.iloc[:,1:]
-
-
-# we standardize the data because of case/scenario labeling in EIA API v2
-df['case_name'] = df['case_name'].replace(
-    {
-        "REF2005": "REFERENCE",
-        "REF2006": "REFERENCE",
-        "REF2007": "REFERENCE",
-        "REF2008": "REFERENCE",
-        "REF2009": "REFERENCE", 
-        "REF2010R": "REFERENCE",
-        "REF2010": "REFERENCE",
-        "REF2011": "REFERENCE",
-        "REF2012": "REFERENCE",
-        "REF2013": "REFERENCE",
-        "REF2014": "REFERENCE", 
-        "REF2015": "REFERENCE",
-        "REF2016": "REFERENCE",
-        "REF2017": "REFERENCE",
-        "REF2018": "REFERENCE",
-        "REF2019": "REFERENCE",
-        "REF2020": "REFERENCE",
-        "REF2021": "REFERENCE",
-        "REF2022": "REFERENCE",
-        "REF2023": "REFERENCE",
-        "REF2025": "REFERENCE",
-        "HM2010": "HIGHMACRO",
-        "LM2010": "LOWMACRO",
-        "HP2010": "HIGHPRICE",
-        "LP2010": "LOWPRICE",
-        "HM2011": "HIGHMACRO",
-        "LM2011": "LOWMACRO",
-        "HP2011HNO": "HIGHPRICE",
-        "LP2011LNO": "LOWPRICE", 
-        "HEUR12": "HSHLEUR",
-        "LEUR12": "LSHLEUR",  
-        "HM2012": "HIGHMACRO",
-        "LM2012": "LOWMACRO",
-        "HP2012": "HIGHPRICE",
-        "LP2012": "LOWPRICE", 
-        })
-
-df['case_name_labels'] = df['case_name'].map(case_name_labels_dict)
-
-
-# we focus on certain scenarios or side cases in the review
-df = df.loc[df.case_name.isin(['ACTUAL', 'HEUR', 'HIGHMACHIGHZTC', 'HIGHMACLOWZTC', 'HIGHMACRO', 'HIGHOGS', 
-                               'HIGHPRICE', 'HIGHRESOURCE', 'HIGHUPIRA', 'HIGHZTC', 'HM2011', 'HM2012', 
-                               'LOWMACHIGHZTC', 'LOWMACLOWZTC',
-                               'HP2011HNO', 'HP2012', 'HSHLEUR', 'LEUR12', 'LM2011', 'LM2012', 
-                               'LOWMACRO', 'LOWOGS', 'LOWPRICE', 'LOWRESOURCE', 'LP2011LNO', 'LP2012', 
-                               'LSHLEUR', 'LOWUPIRA', 'LOWZTC', 'NOIRA', 'REFERENCE',
-                              ]
-                             )
-           ]
-
-# sorting helps with later figures
-years = np.sort(df.year.unique())
-case_names = df.case_name.unique()
+# newer editions of the benchmark are dropped in beside the first one as eia-aeo-mer-benchmark-*.csv
+data_file_pattern = "eia-aeo-mer-benchmark-*.csv"
+
+# we locate the input data file in DASH_BENCHMARK_DATA, src/data or the working directory,
+# and start with the newest benchmark csv next to it
+dashboard_data_path = latest_data_file(find_data_file("eia-aeo-mer-benchmark-nov2024.csv"), data_file_pattern)
+
+
+# bump this whenever build_figures changes so figures cached on disk by an older version are not served
+FIGURE_VERSION = 3
+
+# with DASH_BENCHMARK_COMPACT_FIGURES=1 (or =typed) trace data is rounded, or sent as
+# typed arrays, and json responses are compressed
+compact_figures = compact_mode()
+
+
+def load_data(path, generation):
+    # everything the callbacks need from one csv, built again when a new csv arrives
+    # the cleaned frame is read from its columnar cache whenever that is up to date
+    df = load_benchmark_data(path)
+    logger.info(memory_report(df))
+    version = data_version(path)
+
+    # sorting helps with later figures
+    years = np.sort(df.year.unique())
+    # callbacks gather their rows through this index instead of masking the whole frame
+    series_index = SeriesIndex(df)
+    # the charted indicators as one (indicator x edition x case x year) array, for slices and cross-sections
+    cube = BenchmarkCube(df, indicators)
+    # the grid shows the data as published, without the derived per-capita columns
+    grid_columns = [c for c in df.columns if not is_derived(c)]
+
+    return SimpleNamespace(
+        generation=generation,
+        path=path,
+        version=version,
+        df=df,
+        years=years,
+        # the line chart is built over all years, the year slider only zooms it (see update)
+        all_years=[years[0], years[-1]],
+        case_names=df.case_name.unique().tolist(),
+        series_index=series_index,
+        cube=cube,
+        grid_columns=grid_columns,
+        # rows are paged, sorted and filtered on the server (see grid_rows below), so the
+        # layout ships no data and the browser only holds the blocks in view
+        grid_row_model=GridRowModel(df, series_index, grid_columns),
+        # errors of every projection against the actuals, looked up by the forecast errors tab
+        forecast_errors=ForecastErrors(cube),
+        # built figures are kept in memory and in a folder shared by all workers on this
+        # machine; each csv gets its own cache, so figures of older data are never served
+        figure_cache=FigureCache(directory=os.environ.get(FIGURE_CACHE_ENV, default_cache_dir),
+                                 namespace=f"{FIGURE_VERSION}-{version}"
+                                           + (f"-{compact_figures}" if compact_figures else "")),
+    )
+
+
+# a new eia-aeo-mer-benchmark-*.csv in the data folder is loaded in the background and
+# swapped in without a restart; callbacks read data_manager.current once per call
+data_manager = DataManager(dashboard_data_path, load_data, pattern=data_file_pattern)
+
+# Bootstrap figure templates are read on first use and only the recently used ones are kept
+template_registry = TemplateRegistry()
 
 # stylesheet with the .dbc class to style dcc, DataTable and AG Grid components with a Bootstrap theme
 dbc_css = "https://cdn.jsdelivr.net/gh/AnnMarieW/dash-bootstrap-templates/dbc.min.css"
@@ -105,6 +116,37 @@ app = Dash(__name__, meta_tags=meta_tags,
            title='AEO Retrospective Review', 
            external_stylesheets=[dbc.themes.LUX, dbc.icons.FONT_AWESOME, dbc_css])
 
+if compact_figures:
+    register_response_compression(app.server)
+
+# phase timings, response sizes and cache hit rates of the callbacks, as Prometheus text at /metrics;
+# with DASH_BENCHMARK_SERVER_TIMING=1 each callback response also reports its phases in a Server-Timing header
+callback_metrics = CallbackMetrics()
+register_metrics_route(app, callback_metrics)
+
+
+def cache_metrics():
+    data = data_manager.current
+    figures = data.figure_cache.stats()
+    warmer = cache_warmer.stats()
+    builds = build_pool.stats()
+    return [
+        ("figure_cache_lookups_total", "counter", "Figure cache lookups for the current data, by result.",
+         [({"result": "hit"}, figures["hits"]), ({"result": "disk_hit"}, figures["disk_hits"]),
+          ({"result": "miss"}, figures["misses"])]),
+        ("figure_cache_entries", "gauge", "Figures held in memory.", [({}, figures["entries"])]),
+        ("template_loads_total", "counter", "Figure templates read from disk.", [({}, template_registry.stats()["loads"])]),
+        ("figure_warmups_total", "counter", "Figures the cache warmer was asked for, by result.",
+         [({"result": result}, warmer[result]) for result in ("warmed", "failed", "skipped")]),
+        ("build_processes", "gauge", "Processes building figures for this worker.", [({}, builds["processes"])]),
+        ("offloaded_builds_abandoned_total", "counter", "Offloaded builds a callback stopped waiting for, by reason.",
+         [({"reason": "superseded"}, builds["superseded"]), ({"reason": "timeout"}, builds["timed_out"])]),
+        ("data_generation", "gauge", "Number of times the benchmark csv was loaded.", [({}, data.generation)]),
+    ]
+
+
+callback_metrics.add_collector(cache_metrics)
+
 
 color_mode_switch =  html.Span(
     [
@@ -114,9 +156,9 @@ color_mode_switch =  html.Span(
     ]
 )
 
-# The ThemeChangerAIO loads all 52  Bootstrap themed figure templates to plotly.io
+# the ThemeChangerAIO layout without loading all 52 Bootstrap themed figure templates to plotly.io
 theme_controls = html.Div(
-    [ThemeChangerAIO(aio_id="theme"), color_mode_switch],
+    [theme_changer(aio_id="theme"), color_mode_switch],
     className="hstack gap-3 mt-2"
 )
 
@@ -126,54 +168,66 @@ header = html.H4("Benchmarking EIA's Annual Energy Outlook: a review of select d
 )
 
 
-grid = dag.AgGrid(
-    id="grid",
-    columnDefs=[{"field": i} for i in df.columns],
-    rowData=df.to_dict("records"),
-    defaultColDef={"flex": 1, "minWidth": 120, "sortable": True, "resizable": True, "filter": True},
-    dashGridOptions={"rowSelection":"multiple"}, 
-    #csvExportParams= {"filename": "help.csv", "prependContent": "Help"},
-)
+# the grid, the case dropdown and the year slider depend on the data, so they are made
+# for the current data each time the layout is served (see serve_layout)
+def make_grid(data):
+    return dag.AgGrid(
+        id="grid",
+        columnDefs=[{"field": i, "filter": "agNumberColumnFilter" if pd.api.types.is_numeric_dtype(data.df[i]) else "agTextColumnFilter"}
+                    for i in data.grid_columns],
+        rowModelType="infinite",
+        defaultColDef={"flex": 1, "minWidth": 120, "sortable": True, "resizable": True, "filter": True},
+        dashGridOptions={"rowSelection":"multiple", "cacheBlockSize": 100, "maxBlocksInCache": 20}, 
+        #csvExportParams= {"filename": "help.csv", "prependContent": "Help"},
+    )
 
 
 grid_button = html.Button("Export to csv", id="btn-excel-csv")
 
 
+# the indicator the app opens with
+default_indicator = "PRCE_NA_NA_NA_CR_IMCO_USA_RDLRPBRL"
+
+indicator_options = [
+    {'label':'imported refiner acquisition cost of crude oil (real 2012$)','value':'PRCE_NA_NA_NA_CR_IMCO_USA_RDLRPBRL'},
+    {'label':'imported refiner acquisition cost of crude oil (nominal $)','value':'PRCE_NA_NA_NA_CR_IMCO_USA_NDLRPBRL'},
+    {'label':'total petroleum and other liquids consumption','value':'CNSM_NA_LFL_NA_TOT_NA_USA_MILLBRLPDY'},
+    {'label':'domestic crude oil production','value':'SUP_PRD_NA_NA_CR_NA_USA_MILLBRLPDY'},
+    {'label':'petroleum net imports','value':'TRAD_NA_LFL_TOT_NETIMP_NA_USA_MILLBRLPDY'},
+    {'label':'natural gas price (real 2012$), electric power sector','value':'PRCE_DELV_ELEP_NA_NG_NA_USA_RDLRPMCF'},
+    {'label':'natural gas price (nominal $), electric power sector','value':'PRCE_DELV_ELEP_NA_NG_NA_USA_NDLRPMCF'},
+    {'label':'total natural gas consumption','value':'CNSM_NA_ALLS_NA_NG_TOT_USA_TRLCF'},
+    {'label':'dry natural gas production','value':'SUP_DPR_NA_NA_NG_TOT_USA_TRLCF'},
+    {'label':'natural gas net imports','value':'TRAD_NETIMP_NA_NA_NG_NA_USA_TRLCF'},
+    {'label':'coal prices to electric generating plants (real 2012$)','value':'PRCE_NOM_ELEP_NA_STC_NA_NA_RDLRPMBTU'},
+    {'label':'coal prices to electric generating plants (nominal $)','value':'PRCE_NOM_ELEP_NA_STC_NA_NA_NDLRPMBTU'},
+    {'label':'total coal consumption','value':'CNSM_NA_NA_NA_CL_NA_NA_MILLTON'},
+    {'label':'coal production excluding waste coal','value':'SUP_NA_NA_NA_CL_NA_NA_MILLTON'},
+    {'label':'average electricity prices (real 2012$)','value':'PRCE_NA_ELEP_NA_EDU_NA_USA_RCNTPKWH'},
+    {'label':'average electricity prices (nominal $)','value':'PRCE_NA_ELEP_NA_EDU_NA_USA_NCNTPKWH'},
+    {'label':'total electricity sales excluding direct use','value':'CNSM_NA_ELEP_NA_ELS_NA_USA_BLNKWH'},
+    {'label':'solar net generation (all sectors)','value':'GEN_NA_ALLS_NA_SLR_NA_NA_BLNKWH'},
+    {'label':'wind net generation (all sectors)','value':'GEN_NA_ALLS_NA_WND_NA_NA_BLNKWH'},
+    {'label':'conventional hydroelectric power net generation (all sectors)','value':'GEN_NA_ELEP_NA_HYD_CNV_NA_BLNKWH'},
+    {'label':'coal net generation (all sectors)','value':'GEN_NA_ELEP_TGE_CL_NA_USA_BLNKWH'},
+    {'label':'natural gas net generation (all sectors)','value':'GEN_NA_ELEP_TGE_NG_NA_USA_BLNKWH'},
+    {'label':'nuclear net generation (all sectors)','value':'GEN_NA_ELEP_TGE_NUP_NA_USA_BLNKWH'},
+    {'label':'total energy consumption (all sectors)','value':'CNSM_ENU_TEN_NA_TOT_NA_NA_QBTU'},
+    {'label':'total delivered residential energy consumption','value':'CNSM_ENU_RES_NA_DELE_NA_NA_QBTU'},
+    {'label':'total delivered commercial energy consumption','value':'CNSM_ENU_COMM_NA_DELE_NA_NA_QBTU'},
+    {'label':'total delivered industrial energy consumption','value':'CNSM_ENU_IDAL_NA_DELE_NA_NA_QBTU'},
+    {'label':'total delivered transportation energy consumption','value':'CNSM_ENU_TRN_NA_DELE_NA_NA_QBTU'},
+    {'label':'total energy-related carbon dioxide emissions','value':'EMI_CO2_NA_NA_NA_NA_NA_MILLMTCO2EQ'},
+    {'label':'energy intensity','value':'INY_NA_NA_NA_TEN_NA_NA_THBTUPDLRGDP'},
+]
+
+
 dropdown = html.Div(
     [
         dbc.Label("Select indicator (y-axis)"),
-        dcc.Dropdown([
-            {'label':'imported refiner acquisition cost of crude oil (real 2012$)','value':'PRCE_NA_NA_NA_CR_IMCO_USA_RDLRPBRL'},
-            {'label':'imported refiner acquisition cost of crude oil (nominal $)','value':'PRCE_NA_NA_NA_CR_IMCO_USA_NDLRPBRL'},
-            {'label':'total petroleum and other liquids consumption','value':'CNSM_NA_LFL_NA_TOT_NA_USA_MILLBRLPDY'},
-            {'label':'domestic crude oil production','value':'SUP_PRD_NA_NA_CR_NA_USA_MILLBRLPDY'},
-            {'label':'petroleum net imports','value':'TRAD_NA_LFL_TOT_NETIMP_NA_USA_MILLBRLPDY'},
-            {'label':'natural gas price (real 2012$), electric power sector','value':'PRCE_DELV_ELEP_NA_NG_NA_USA_RDLRPMCF'},
-            {'label':'natural gas price (nominal $), electric power sector','value':'PRCE_DELV_ELEP_NA_NG_NA_USA_NDLRPMCF'},
-            {'label':'total natural gas consumption','value':'CNSM_NA_ALLS_NA_NG_TOT_USA_TRLCF'},
-            {'label':'dry natural gas production','value':'SUP_DPR_NA_NA_NG_TOT_USA_TRLCF'},
-            {'label':'natural gas net imports','value':'TRAD_NETIMP_NA_NA_NG_NA_USA_TRLCF'},
-            {'label':'coal prices to electric generating plants (real 2012$)','value':'PRCE_NOM_ELEP_NA_STC_NA_NA_RDLRPMBTU'},
-            {'label':'coal prices to electric generating plants (nominal $)','value':'PRCE_NOM_ELEP_NA_STC_NA_NA_NDLRPMBTU'},
-            {'label':'total coal consumption','value':'CNSM_NA_NA_NA_CL_NA_NA_MILLTON'},
-            {'label':'coal production excluding waste coal','value':'SUP_NA_NA_NA_CL_NA_NA_MILLTON'},
-            {'label':'average electricity prices (real 2012$)','value':'PRCE_NA_ELEP_NA_EDU_NA_USA_RCNTPKWH'},
-            {'label':'average electricity prices (nominal $)','value':'PRCE_NA_ELEP_NA_EDU_NA_USA_NCNTPKWH'},
-            {'label':'total electricity sales excluding direct use','value':'CNSM_NA_ELEP_NA_ELS_NA_USA_BLNKWH'},
-            {'label':'solar net generation (all sectors)','value':'GEN_NA_ALLS_NA_SLR_NA_NA_BLNKWH'},
-            {'label':'wind net generation (all sectors)','value':'GEN_NA_ALLS_NA_WND_NA_NA_BLNKWH'},
-            {'label':'conventional hydroelectric power net generation (all sectors)','value':'GEN_NA_ELEP_NA_HYD_CNV_NA_BLNKWH'},
-            {'label':'coal net generation (all sectors)','value':'GEN_NA_ELEP_TGE_CL_NA_USA_BLNKWH'},
-            {'label':'natural gas net generation (all sectors)','value':'GEN_NA_ELEP_TGE_NG_NA_USA_BLNKWH'},
-            {'label':'nuclear net generation (all sectors)','value':'GEN_NA_ELEP_TGE_NUP_NA_USA_BLNKWH'},
-            {'label':'total energy consumption (all sectors)','value':'CNSM_ENU_TEN_NA_TOT_NA_NA_QBTU'},
-            {'label':'total delivered residential energy consumption','value':'CNSM_ENU_RES_NA_DELE_NA_NA_QBTU'},
-            {'label':'total delivered commercial energy consumption','value':'CNSM_ENU_COMM_NA_DELE_NA_NA_QBTU'},
-            {'label':'total delivered industrial energy consumption','value':'CNSM_ENU_IDAL_NA_DELE_NA_NA_QBTU'},
-            {'label':'total delivered transportation energy consumption','value':'CNSM_ENU_TRN_NA_DELE_NA_NA_QBTU'},
-            {'label':'total energy-related carbon dioxide emissions','value':'EMI_CO2_NA_NA_NA_NA_NA_MILLMTCO2EQ'},
-            {'label':'energy intensity','value':'INY_NA_NA_NA_TEN_NA_NA_THBTUPDLRGDP'}],
-            "PRCE_NA_NA_NA_CR_IMCO_USA_RDLRPBRL",
+        dcc.Dropdown(
+            indicator_options,
+            default_indicator,
             id="indicator",
             clearable=False,
         ),
@@ -182,56 +236,63 @@ dropdown = html.Div(
 )
 
 
-checklist = html.Div(
-    [
-        dbc.Label("Select AEO Case or MER Actual"),
-        dcc.Dropdown([
-            {'label':'Actual','value':'ACTUAL'},
-            {'label':'Oil and Gas: High Shale EUR','value':'HSHLEUR'},
-            {'label':'High Macro and High Zero-Carbon Technology Cost','value':'HIGHMACHIGHZTC'},
-            {'label':'High Macro and Low Zero-Carbon Technology Cost','value':'HIGHMACLOWZTC'},
-            {'label':'High Economic Growth','value':'HIGHMACRO'},
-            {'label':'High Oil and Gas Supply','value':'HIGHOGS'},
-            {'label':'High Oil Price','value':'HIGHPRICE'},
-            {'label':'Oil and Gas: High Oil and Gas Resource','value':'HIGHRESOURCE'},
-            {'label':'High Uptake of Inflation Reduction Act','value':'HIGHUPIRA'},
-            {'label':'High Zero-Carbon Technology Cost','value':'HIGHZTC'},
-            {'label':'Low Macro and High Zero-Carbon Technology Cost','value':'LOWMACHIGHZTC'},
-            {'label':'Low Macro and Low Zero-Carbon Technology Cost','value':'LOWMACLOWZTC'}, 
-            {'label':'Oil and Gas: Low Shale EUR','value':'LSHLEUR'},
-            {'label':'Low Economic Growth','value':'LOWMACRO'},
-            {'label':'Low Oil and Gas Supply','value':'LOWOGS'},
-            {'label':'Oil and Gas: Low Oil and Gas Resource','value':'LOWRESOURCE'},
-            {'label':'Low Oil Price','value':'LOWPRICE'},
-            {'label':'Low Uptake of Inflation Reduction Act','value':'LOWUPIRA'},
-            {'label':'Low Zero-Carbon Technology Cost','value':'LOWZTC'},
-            {'label':'No Inflation Reduction Act','value':'NOIRA'},
-            {'label':'Reference case','value':'REFERENCE'}],
-            case_names, 
-            id="case_names", 
-            clearable=False, 
-            multi=True,
-        )
-    ], 
-    className="mb-4",
-)
+def make_checklist(data):
+    return html.Div(
+        [
+            dbc.Label("Select AEO Case or MER Actual"),
+            dcc.Dropdown([
+                {'label':'Actual','value':'ACTUAL'},
+                {'label':'Oil and Gas: High Shale EUR','value':'HSHLEUR'},
+                {'label':'High Macro and High Zero-Carbon Technology Cost','value':'HIGHMACHIGHZTC'},
+                {'label':'High Macro and Low Zero-Carbon Technology Cost','value':'HIGHMACLOWZTC'},
+                {'label':'High Economic Growth','value':'HIGHMACRO'},
+                {'label':'High Oil and Gas Supply','value':'HIGHOGS'},
+                {'label':'High Oil Price','value':'HIGHPRICE'},
+                {'label':'Oil and Gas: High Oil and Gas Resource','value':'HIGHRESOURCE'},
+                {'label':'High Uptake of Inflation Reduction Act','value':'HIGHUPIRA'},
+                {'label':'High Zero-Carbon Technology Cost','value':'HIGHZTC'},
+                {'label':'Low Macro and High Zero-Carbon Technology Cost','value':'LOWMACHIGHZTC'},
+                {'label':'Low Macro and Low Zero-Carbon Technology Cost','value':'LOWMACLOWZTC'}, 
+                {'label':'Oil and Gas: Low Shale EUR','value':'LSHLEUR'},
+                {'label':'Low Economic Growth','value':'LOWMACRO'},
+                {'label':'Low Oil and Gas Supply','value':'LOWOGS'},
+                {'label':'Oil and Gas: Low Oil and Gas Resource','value':'LOWRESOURCE'},
+                {'label':'Low Oil Price','value':'LOWPRICE'},
+                {'label':'Low Uptake of Inflation Reduction Act','value':'LOWUPIRA'},
+                {'label':'Low Zero-Carbon Technology Cost','value':'LOWZTC'},
+                {'label':'No Inflation Reduction Act','value':'NOIRA'},
+                {'label':'Reference case','value':'REFERENCE'}],
+                data.case_names, 
+                id="case_names", 
+                clearable=False, 
+                multi=True,
+            )
+        ], 
+        className="mb-4",
+    )
 
-slider = html.Div(
-    [
-        dbc.Label("Select Years"),
-        dcc.RangeSlider(
-            years[0],
-            years[-1],
-            1,
-            id="years",
-            marks=None,
-            tooltip={"placement": "bottom", "always_visible": True},
-            value=[years[21], years[-1]],
-            className="p-0",
-        ),
-    ],
-    className="mb-4",
-)
+def default_years(data):
+    return [data.years[21], data.years[-1]]
+
+
+def make_slider(data):
+    years = data.years
+    return html.Div(
+        [
+            dbc.Label("Select Years"),
+            dcc.RangeSlider(
+                years[0],
+                years[-1],
+                1,
+                id="years",
+                marks=None,
+                tooltip={"placement": "bottom", "always_visible": True},
+                value=default_years(data),
+                className="p-0",
+            ),
+        ],
+        className="mb-4",
+    )
 
 
 theme_colors = [
@@ -256,10 +317,6 @@ colors = html.Div(["Theme Colors:", colors], className="mt-2")
 colors = html.Div(f" ")
 
 
-controls = dbc.Card(
-    [dropdown, checklist, slider], 
-    body=True,
-)
 citation_controls = html.Div(
     [], id="fig-citation", className="mt-2")
 citation_controls = html.Div([citation_controls, html.A("Link to EIA's open data API for Annual Energy Outlooks ", href='https://www.eia.gov/opendata/browser/aeo', target="_blank"), 
@@ -273,235 +330,502 @@ citations  = dbc.Card(
 """
 
 
-tab1 = dbc.Tab([dcc.Graph(id="line-chart", figure=px.line(template="simple_white"), style={'height': '85vh'})], label="Line Chart")
-tab2 = dbc.Tab([dcc.Graph(id="scatter-chart", figure=px.scatter(template="simple_white"), style={'height': '85vh'})], label=" ", disabled=True)
-tab3 = dbc.Tab([grid,grid_button], label="Grid", className="p-4")
-tabs = dbc.Card(dbc.Tabs([tab1, tab3, tab2]))
+tab1 = dbc.Tab([dcc.Graph(id="line-chart", figure=px.line(template="simple_white"), style={'height': '85vh'}),
+                dcc.Store(id="line-chart-key")], label="Line Chart", tab_id="tab-line")
+tab2 = dbc.Tab([dcc.Graph(id="scatter-chart", figure=px.scatter(template="simple_white"), style={'height': '85vh'}),
+                dcc.Store(id="scatter-chart-key")], label=" ", disabled=True, tab_id="tab-scatter")
+
+# how far past projections of the selected cases were from the actuals, by horizon and by edition
+error_metric = dbc.RadioItems(id="error-metric", options=[{"label": label, "value": value} for value, label in error_metrics.items()],
+                              value="mape", inline=True, className="mb-2")
+error_grid = dag.AgGrid(
+    id="error-grid",
+    columnDefs=[{"field": "edition"}, {"field": "case_name_labels", "headerName": "case"},
+                {"field": "n", "headerName": "years", "filter": "agNumberColumnFilter"}]
+               + [{"field": metric, "filter": "agNumberColumnFilter"} for metric in error_metrics],
+    defaultColDef={"flex": 1, "minWidth": 100, "sortable": True, "resizable": True, "filter": True},
+    style={'height': '35vh'},
+)
+# small multiples: one line chart panel per indicator for the selected cases, e.g. coal, natural gas and nuclear generation
+compare_indicators = dcc.Dropdown(indicator_options,
+                                  ["GEN_NA_ELEP_TGE_CL_NA_USA_BLNKWH", "GEN_NA_ELEP_TGE_NG_NA_USA_BLNKWH",
+                                   "GEN_NA_ELEP_TGE_NUP_NA_USA_BLNKWH"],
+                                  id="compare-indicators", multi=True, className="mb-2")
+tab5 = dbc.Tab([compare_indicators, dcc.Graph(id="compare-chart", figure=px.line(template="simple_white"), style={'height': '80vh'})],
+               label="Compare", className="p-4", tab_id="tab-compare")
 
+tab4 = dbc.Tab([error_metric, dcc.Graph(id="error-chart", figure=px.line(template="simple_white"), style={'height': '50vh'}),
+                error_grid], label="Forecast Errors", className="p-4", tab_id="tab-errors")
+
+# figure templates are served as json by name, see the theme callback at the end
+template_urls = dcc.Store(id="template-urls", data=register_template_route(app, template_registry))
+
+
+def serve_layout():
+    # served on every page load, so a page opened after a new csv was loaded shows its cases and years
+    data = data_manager.current
+
+    controls = dbc.Card(
+        [dropdown, make_checklist(data), make_slider(data)], 
+        body=True,
+    )
+    tab3 = dbc.Tab([make_grid(data),grid_button], label="Grid", className="p-4", tab_id="tab-grid")
+    tabs = dbc.Card(dbc.Tabs([tab1, tab5, tab3, tab4, tab2], id="tabs", active_tab="tab-line"))
+
+    return dbc.Container(
+        [
+            header,
+            dbc.Row([
+                dbc.Col([
+                    controls,
+                    # ************************************
+                    # Uncomment line below when running locally!
+                    # ************************************
+                    theme_controls
+                ],  width=3),
+                dbc.Col([tabs, citation_controls], width=9),
+            ]),
+            template_urls,
+            # a newer figure request of this page supersedes an older one still waiting for its build
+            dcc.Store(id="session-id", data=uuid.uuid4().hex),
+        ],
+        fluid=True,
+        #style={"height": "100vh"},
+        className="dbc dbc-ag-grid",
+    )
+
+
+app.layout = serve_layout
+
+
+def citation(indicator):
+    return f"{source_for(indicator)}. Note: Dollars are adjusted to 2012$, unless noted otherwise."
+
+
+def build_line_figure(data, indicator, case_name, yrs, template_name):
+    with callback_metrics.phase("filter"):
+        dff = data.series_index.frame([indicator], case_name, yrs)
+    return line_chart(dff, indicator, template_name)
+
+
+def line_chart(dff, indicator, template_name):
+    # traces are created with their final edition styling in one pass (see utils.figures),
+    # so the line chart has no separate style phase
+    with callback_metrics.phase("build"):
+        return line_figure(dff, indicator, f"<b>{title_for(indicator)}</b><br>({units_for(indicator)})",
+                           template_registry.template(template_name))
+
+
+def line_panels(data, selected, case_name, template_name, session=None):
+    """The plain line chart of each indicator in `selected`, over all years.
+
+    These are the figures of the line chart tab under the same cache keys, so
+    an indicator is only built the first time it is shown with these cases in
+    either tab. The indicators that are not cached are built together, see
+    build_line_panels.
+    """
+    keys = [FigureCache.key(build_line_figure.__name__, indicator, case_name, data.all_years, template_name)
+            for indicator in selected]
+    for key in keys:
+        cache_warmer.record(key)
+    panels = [data.figure_cache.get(key) for key in keys]
+    missing = [i for i, panel in enumerate(panels) if panel is None]
+    if missing:
+        keep = lambda built: [data.figure_cache.set(keys[i], figure) for i, figure in zip(missing, built)]
+        built = build_offloaded(data, session, keep, build_line_panels,
+                                [selected[i] for i in missing], case_name, template_name)
+        for i, figure in zip(missing, built):
+            panels[i] = figure
+    return panels
+
+
+def build_line_panels(data, selected, case_name, template_name):
+    # the rows of all indicators are gathered from the cube in one pass and each panel is built from its column
+    with callback_metrics.phase("filter"):
+        dff = data.cube.frame(selected, case_name, data.all_years)
+    return [plain_figure(line_chart(dff[BenchmarkCube.key_columns + [indicator]], indicator, template_name), indicator)
+            for indicator in selected]
+
+
+def build_scatter_figure(data, indicator, case_name, yrs, template_name):
+    # per-capita metrics are precomputed at ingest (see utils.derived), so no arithmetic here
+    with callback_metrics.phase("filter"):
+        dff = data.series_index.frame([indicator, GDP_PER_CAPITA], case_name, yrs)
+    textString = citation(indicator)
+
+    with callback_metrics.phase("derive"):
+        dff = dff[(dff.edition.astype(str) >= "2023")].sort_values(by=["year","edition"])
+
+    with callback_metrics.phase("build"):
+        fig_scatter = px.scatter(
+            dff,
+            x=GDP_PER_CAPITA,
+            y=indicator,
+            color="case_name_labels",
+            color_discrete_map={
+                'High Macro and High Zero-Carbon Technology Cost': "#3182bd",
+                'High Macro and Low Zero-Carbon Technology Cost': "#31a354",
+                'High Economic Growth': "#e6550d",
+                'High Oil and Gas Supply': "#756bb1",
+                'High Oil Price': "#de2d26",
+                'High Uptake of Inflation Reduction Act': "#6e40aa",
+                'High Zero-Carbon Technology Cost': "#80cdc1",
+                'Low Macro and High Zero-Carbon Technology Cost': "#9ecae1",
+                'Low Macro and Low Zero-Carbon Technology Cost': "#a1d99b",
+                'Low Economic Growth': "#fdae6b",
+                'Low Oil and Gas Supply': "#bcbddc",
+                'Low Oil Price': "#fc9272",
+                'Low Uptake of Inflation Reduction Act': "#aff05b",
+                'Low Zero-Carbon Technology Cost': "#28ea8d",
+                'No Inflation Reduction Act': "#a6611a",
+                'Reference case': "#dfc27d",
+                'Actual': "black",
+                },
+            symbol="edition",
+            log_x=True,
+            labels={indicator: f"{title_for(indicator)} ", GDP_PER_CAPITA: "real GDP per capita", "edition": "edition", "case_name_labels": "case"},
+            size_max=60,
+            template=template_registry.template(template_name),
+            title=f"<b>{title_for(indicator)} vs. Real GDP per capita</b><br>({units_for(indicator)})", 
+            )
+
+
+    with callback_metrics.phase("style"):
+        fig_scatter.update_traces(textposition="bottom right")
+        fig_scatter.update_layout(yaxis=dict(title=None, exponentformat= None, separatethousands= True, tickfont_size=26), 
+                                  xaxis=dict(tickprefix= '$', separatethousands= True, tickfont_size=26) )
+        fig_scatter.for_each_trace(
+            lambda trace: trace.update(marker=dict(size=10, color="black"), line=dict(width=2, color="DarkSlateGrey")) if trace.name == "Actual, 2024" else 
+            (trace.update(marker=dict(size=8), line=dict(width=2, color="DarkSlateGrey"))),)
+        fig_scatter.update_xaxes(showline=True, linewidth=2, linecolor='black')
+
+
+        # Add the annotation text using paper reference. See:
+        # https://stackoverflow.com/questions/76046269/how-to-align-annotation-to-the-edge-of-whole-figure-in-plotly
+        # https://community.plotly.com/t/interactive-app-to-explain-legend-and-annotations-positioning/65160
+        fig_scatter.add_annotation(
+            text = textString,
+            font = {
+                'size' : 14,
+                #'family' : 'Times New Roman',
+                'color': 'gray',
+            },
+            xref = "paper", 
+            yref = "paper",
+            x = -0.01, 
+            y = -0.15,  
+            align='left',
+            showarrow = False
+        )
+        fig_scatter.update_traces(visible='legendonly', selector=dict(name="d")) 
+
+    return fig_scatter
+
+
+# the views the warmer builds are figure cache keys, their chart is the name of the builder
+view_builders = {build.__name__: build for build in (build_line_figure, build_scatter_figure)}
+
+
+def warm_view(data, view):
+    chart, indicator, case_name, yrs, template_name = view
+    # popular views of an older csv may name an indicator this one lacks
+    if indicator in data.df.columns:
+        cached_view(data, view_builders[chart], indicator, list(case_name), list(yrs), template_name)
+
+
+# figures are built into the cache in the background at start-up and after each reload: the
+# default view first, then the views asked for most often, then the line chart of every indicator
+cache_warmer = CacheWarmer(warm_view)
+
+
+def warm_caches(data):
+    template_name = template_name_for(default_theme_url, True)
+    # the line chart holds every year, the year slider only zooms it, so the default years need no figure of their own
+    line_view = lambda indicator: FigureCache.key(build_line_figure.__name__, indicator, data.case_names,
+                                                  data.all_years, template_name)
+    views = [line_view(indicator) for indicator in indicators if indicator != default_indicator]
+    # each worker goes through them in its own order and finds what the others built in the disk tier
+    random.shuffle(views)
+    cache_warmer.schedule(data, [line_view(default_indicator)] + views)
+
+
+data_manager.subscribe(warm_caches)
+
+
+def template_name_for(theme, color_mode_switch_on):
+    theme_name = template_from_url(theme)
+    return theme_name if color_mode_switch_on else theme_name + "_dark"
+
+
+def cached_figure(data, build, indicator, case_name, yrs, theme, color_mode_switch_on, session=None):
+    figure, key = cached_view(data, build, indicator, case_name, yrs, template_name_for(theme, color_mode_switch_on),
+                              session)
+    cache_warmer.record(key)
+    return figure, key
+
+
+def cached_view(data, build, indicator, case_name, yrs, template_name, session=None):
+    # repeat views are served from the figure cache, keyed on the chart and its canonical inputs
+    key = FigureCache.key(build.__name__, indicator, case_name, yrs, template_name)
+    figure = data.figure_cache.get(key)
+    if figure is None:
+        figure = build_offloaded(data, session, lambda built: data.figure_cache.set(key, built),
+                                 view_figure, build, indicator, case_name, yrs, template_name)
+    return figure, key
+
+
+def view_figure(data, build, indicator, case_name, yrs, template_name):
+    return plain_figure(build(data, indicator, case_name, yrs, template_name), indicator)
 
-app.layout = dbc.Container(
-    [
-        header,
-        dbc.Row([
-            dbc.Col([
-                controls,
-                # ************************************
-                # Uncomment line below when running locally!
-                # ************************************
-                theme_controls
-            ],  width=3),
-            dbc.Col([tabs, citation_controls], width=9),
-        ]),
-    ],
-    fluid=True,
-    #style={"height": "100vh"},
-    className="dbc dbc-ag-grid",
-)
 
+# with DASH_BENCHMARK_BUILD_PROCESSES set, figures are built in processes forked from this
+# worker, so a slow build does not hold the GIL while the worker's threads serve other requests
+build_pool = BuildPool()
 
+
+def build_offloaded(data, session, keep, func, *args):
+    """`func(data, *args)` in a build process if there are any, else in this thread; `keep` gets the result.
+
+    `session` (the page and the callback) lets a newer request of the same page
+    supersede this one while it waits, see BuildPool. Superseded and waits past
+    the build timeout raise, and the callbacks then leave the page as it is.
+    """
+    if build_pool.enabled:
+        try:
+            with callback_metrics.phase("offload"):
+                return build_pool.run(session, keep, in_build_process, data.version, data.path, data.generation,
+                                      func, *args)
+        except BrokenProcessPool:
+            pass
+    built = func(data, *args)
+    keep(built)
+    return built
+
+
+def in_build_process(version, path, generation, func, *args):
+    # the process was forked with the data of that time; after a reload it loads the csv the request was made with
+    data = data_manager.current
+    if data.version != version:
+        data = data_manager.current = load_data(path, generation)
+    return func(data, *args)
+
+
+def plain_figure(figure, indicator):
+    with callback_metrics.phase("plain"):
+        plain = to_plain(figure)
+        if compact_figures:
+            # the scatter chart's x-axis is GDP per capita, the line chart's the years
+            plain = compact_figure(plain, {"x": decimals_for(GDP_PER_CAPITA), "y": decimals_for(indicator)},
+                                   typed=compact_figures == "typed")
+    return plain
+
+
+def shown_figure_key(data, stored):
+    # the *-key stores hold the data version with the key, a figure of an older csv is never patched
+    if stored and stored.get("data") == data.version:
+        return FigureCache.key(*stored["key"])
+    return None
+
+
+def patch_or_figure(data, figure, key, shown, prepare=lambda fig: fig):
+    # when only the cases changed, the browser gets the traces to add or remove as a
+    # Patch of the figure it shows, provided that figure is still in the cache
+    if shown and shown[:2] == key[:2] and shown[3:] == key[3:]:
+        shown_figure = data.figure_cache.get(shown)
+        if shown_figure:
+            with callback_metrics.phase("patch"):
+                return figure_patch(prepare(shown_figure), figure)
+    return figure
+
+
+# each chart is only built while its tab is visible, and only when its inputs
+# changed since the figure the browser already shows (its cache key is kept in the *-key stores)
 @callback(
     Output("line-chart", "figure" ),
-    Output("scatter-chart", "figure"),
-    Output("grid", "dashGridOptions"),
-    Output("fig-citation", component_property='children'),
+    Output("line-chart-key", "data"),
     Input("indicator", "value"),
     Input("case_names", "value"),
+    Input("tabs", "active_tab"),
+    State("years", "value"),
+    State("line-chart-key", "data"),
+    State(ThemeChangerAIO.ids.radio("theme"), "value"),
+    State("switch", "value"),
+    State("session-id", "data"),
+)
+@callback_metrics.instrument("update")
+def update(indicator, case_name, active_tab, yrs, shown_key, theme, color_mode_switch_on, session=None):
+
+    if case_name == [] or indicator is None:
+        return {}, None
+
+    if active_tab != "tab-line":
+        return no_update, no_update
+
+    # one snapshot of the data for the whole call, even if a new csv is swapped in meanwhile
+    data = data_manager.current
+    try:
+        fig, key = cached_figure(data, build_line_figure, indicator, case_name, data.all_years, theme,
+                                 color_mode_switch_on, session and (session, "update"))
+    except (Superseded, TimeoutError):
+        return no_update, no_update
+    shown = shown_figure_key(data, shown_key)
+    if key == shown:
+        return no_update, no_update
+    zoom = lambda figure: with_year_range(figure, yrs)
+    with callback_metrics.phase("zoom"):
+        fig = zoom(fig)
+    return patch_or_figure(data, fig, key, shown, zoom), {"data": data.version, "key": key}
+
+
+# moving the year slider only zooms the line chart in the browser, see assets/year_range.js
+clientside_callback(
+    ClientsideFunction(namespace="figures", function_name="yearRange"),
+    Output("line-chart", "figure", allow_duplicate=True),
     Input("years", "value"),
+    State("line-chart", "figure"),
+    prevent_initial_call=True
+)
+
+
+@callback(
+    Output("scatter-chart", "figure" ),
+    Output("scatter-chart-key", "data"),
+    Input("indicator", "value"),
+    Input("case_names", "value"),
+    Input("years", "value"),
+    Input("tabs", "active_tab"),
+    State("scatter-chart-key", "data"),
     State(ThemeChangerAIO.ids.radio("theme"), "value"),
     State("switch", "value"),
+    State("session-id", "data"),
 )
-def update(indicator, case_name, yrs, theme, color_mode_switch_on):
-
-    # Defining all the conditions inside a function
-    def conditions_(x):
-        if x=="2024":
-            return fig.update_traces(line_color='purple')
-        elif x=="2021":
-            return fig.update_traces(line_color='green')
-        else:
-            return None
-        
-    def conditions_prefix(x):
-        if x=="PRCE":
-            return fig.update_layout(yaxis=dict(tickprefix= '$', separatethousands= True, tickfont_size=26))
-        else:
-            return None
+@callback_metrics.instrument("update_scatter")
+def update_scatter(indicator, case_name, yrs, active_tab, shown_key, theme, color_mode_switch_on, session=None):
 
+    if case_name == [] or indicator is None:
+        return {}, None
+
+    if active_tab != "tab-scatter":
+        return no_update, no_update
+
+    data = data_manager.current
+    try:
+        fig_scatter, key = cached_figure(data, build_scatter_figure, indicator, case_name, yrs, theme,
+                                         color_mode_switch_on, session and (session, "update_scatter"))
+    except (Superseded, TimeoutError):
+        return no_update, no_update
+    shown = shown_figure_key(data, shown_key)
+    if key == shown:
+        return no_update, no_update
+    return patch_or_figure(data, fig_scatter, key, shown), {"data": data.version, "key": key}
+
+
+@callback(
+    Output("compare-chart", "figure"),
+    Input("compare-indicators", "value"),
+    Input("case_names", "value"),
+    Input("years", "value"),
+    Input("tabs", "active_tab"),
+    State(ThemeChangerAIO.ids.radio("theme"), "value"),
+    State("switch", "value"),
+    State("session-id", "data"),
+)
+@callback_metrics.instrument("update_compare")
+def update_compare(selected, case_name, yrs, active_tab, theme, color_mode_switch_on, session=None):
+
+    if case_name == [] or not selected:
+        return {}
+
+    if active_tab != "tab-compare":
+        return no_update
+
+    data = data_manager.current
+    try:
+        panels = line_panels(data, selected, case_name, template_name_for(theme, color_mode_switch_on),
+                             session and (session, "update_compare"))
+    except (Superseded, TimeoutError):
+        return no_update
+    # the cached panels hold every year; each is zoomed to the slider and fitted on its own y-axis
+    with callback_metrics.phase("zoom"):
+        panels = [with_year_range(panel, yrs) for panel in panels]
+    with callback_metrics.phase("compose"):
+        return small_multiples(panels, [f"<b>{title_for(i)}</b> ({units_for(i)})" for i in selected])
+
+
+@callback(
+    Output("error-chart", "figure"),
+    Output("error-grid", "rowData"),
+    Input("indicator", "value"),
+    Input("case_names", "value"),
+    Input("error-metric", "value"),
+    Input("tabs", "active_tab"),
+    State(ThemeChangerAIO.ids.radio("theme"), "value"),
+    State("switch", "value"),
+)
+@callback_metrics.instrument("update_errors")
+def update_errors(indicator, case_name, metric, active_tab, theme, color_mode_switch_on):
 
     if case_name == [] or indicator is None:
-        return {}, {}, {}
+        return {}, []
 
-    theme_name = template_from_url(theme)
-    template_name = theme_name if color_mode_switch_on else theme_name + "_dark"
-
-    dff = df[df.year.between(yrs[0], yrs[1])]
-    dff = dff[dff.case_name.isin(case_name)]
-    dff['PER_CAPITA'] = dff[indicator].div(dff['DMG_POP_NA_NA_NA_NA_NA_MILL'])
-    dff['GDP_PER_CAPITA'] = (dff["ECI_NA_NA_NA_GDP_REAL_NA_BLNY09DLR"].div(dff['DMG_POP_NA_NA_NA_NA_NA_MILL'])).mul(1000)
-    test_units = indicator.rsplit('_',1)[-1]
-     
-    fig = px.line(
-        dff.sort_values(by=["edition","case_name_labels"],ascending=True),
-        x="year",
-        y=indicator,
-        color="edition",
-        line_group="case_name_labels",
-        #line_dash="case_name",
-        labels={"edition": "edition", "case_name_labels": "case"},
-        title=f"<b>{titles_dict.get(indicator,'title not found')}</b><br>({units_dict.get(test_units,'units not found')})",
-        template=template_name,
-    )
+    if active_tab != "tab-errors":
+        return no_update, no_update
 
-    fig.for_each_trace(
-        lambda trace: trace.update(line_color="black", line_width=4) if trace.legendgroup == "2024" else (),)
-    
-    fig.update_layout(yaxis=dict(title=None, tickfont_size=26), 
-                      xaxis=dict(tickfont_size=26, automargin=True),
-                      legend=dict(font=dict(size=26,)), title=dict(font=dict(size=26)),  
-                      paper_bgcolor='rgba(0, 0, 0, 0)',
-                      plot_bgcolor='rgba(0, 0, 0, 0)',
-                      modebar=dict(
-                        orientation='h',
-                        bgcolor='#ffffff',
-                        color='red',
-                        activecolor='red',
-                        )
-                        )
-    
-
-    conditions_prefix(indicator[:4])
-
-    fig.update_xaxes(
-        mirror=False,
-        ticks='outside',
-        showline=True,
-        linecolor='black',
-        linewidth=2, 
-        gridcolor='lightgrey',
-        title_font = {"size": 26},
-        title_standoff = 1
-    )
-    fig.update_yaxes(
-        mirror=True,
-        ticks=None,
-        showline=False,
-        linecolor='black',
-        gridcolor='lightgrey'
-    )
-    fig.update_traces(selector=dict(legendgroup="2005"), line=dict(color=colors_dict.get('dhs-dark-gray-70')))
-    fig.update_traces(selector=dict(legendgroup="2006"), line=dict(color=colors_dict.get('dhs-dark-gray-60')))
-    fig.update_traces(selector=dict(legendgroup="2007"), line=dict(color=colors_dict.get('dhs-dark-gray-40')))
-    fig.update_traces(selector=dict(legendgroup="2008"), line=dict(color=colors_dict.get('dhs-dark-gray-30')))
-    fig.update_traces(selector=dict(legendgroup="2009"), line=dict(color=colors_dict.get('dhs-dark-gray-20')))
-    fig.update_traces(selector=dict(legendgroup="2010"), line=dict(color=colors_dict.get('dhs-green-70')))
-
-    fig.update_traces(selector=dict(legendgroup="2011"), line=dict(color=colors_dict.get('dhs-green-60')))
-    fig.update_traces(selector=dict(legendgroup="2012"), line=dict(color=colors_dict.get('dhs-green-40')))
-    fig.update_traces(selector=dict(legendgroup="2013"), line=dict(color=colors_dict.get('dhs-green-30')))
-    fig.update_traces(selector=dict(legendgroup="2014"), line=dict(color=colors_dict.get('dhs-green-20')))
-
-    fig.update_traces(selector=dict(legendgroup="2015"), line=dict(color=colors_dict.get('dhs-red-70')))
-    fig.update_traces(selector=dict(legendgroup="2016"), line=dict(color=colors_dict.get('dhs-red-60')))
-    fig.update_traces(selector=dict(legendgroup="2017"), line=dict(color=colors_dict.get('dhs-red-40')))
-    fig.update_traces(selector=dict(legendgroup="2018"), line=dict(color=colors_dict.get('dhs-red-30')))
-    fig.update_traces(selector=dict(legendgroup="2019"), line=dict(color=colors_dict.get('dhs-red-20')))
-    fig.update_traces(selector=dict(legendgroup="2020"), line=dict(color=colors_dict.get('dhs-light-blue-70')))
-    fig.update_traces(selector=dict(legendgroup="2021"), line=dict(color=colors_dict.get('dhs-light-blue-60')))
-    fig.update_traces(selector=dict(legendgroup="2022"), line=dict(color=colors_dict.get('dhs-light-blue-40')))
-    fig.update_traces(selector=dict(legendgroup="2023"), line=dict(color=colors_dict.get('dhs-light-blue-30')))
-    
-
-    textString = f"{sources_dict.get(indicator,'not found')}. Note: Dollars are adjusted to 2012$, unless noted otherwise."
-    
-    # Add the annotation text using paper reference. See:
-    # https://stackoverflow.com/questions/76046269/how-to-align-annotation-to-the-edge-of-whole-figure-in-plotly
-    # https://community.plotly.com/t/interactive-app-to-explain-legend-and-annotations-positioning/65160
-    """
-    fig.add_annotation(
-        text = textString,
-        font = {
-            'size' : 14,
-            'color': 'gray',
-        },
-        xref = "paper", 
-        yref = "paper",
-        x = -0.01, 
-        y = -0.09, #yCord - yOffset,
-        align='left',        
-        showarrow = False
-    )
-    """
+    # the errors are computed when the data is loaded, so this is only a lookup
+    data = data_manager.current
+    template_name = template_name_for(theme, color_mode_switch_on)
+    with callback_metrics.phase("filter"):
+        by_horizon = data.forecast_errors.table("by_horizon", indicator, case_name)
+        by_edition = data.forecast_errors.table("by_edition", indicator, case_name)
 
-        
-    fig_scatter = px.scatter(
-        dff[(dff.edition >= "2023")].sort_values(by=["year","edition"]),
-        x="GDP_PER_CAPITA",
-        y=indicator,
-        color="case_name_labels",
-        color_discrete_map={
-            'High Macro and High Zero-Carbon Technology Cost': "#3182bd",
-            'High Macro and Low Zero-Carbon Technology Cost': "#31a354",
-            'High Economic Growth': "#e6550d",
-            'High Oil and Gas Supply': "#756bb1",
-            'High Oil Price': "#de2d26",
-            'High Uptake of Inflation Reduction Act': "#6e40aa",
-            'High Zero-Carbon Technology Cost': "#80cdc1",
-            'Low Macro and High Zero-Carbon Technology Cost': "#9ecae1",
-            'Low Macro and Low Zero-Carbon Technology Cost': "#a1d99b",
-            'Low Economic Growth': "#fdae6b",
-            'Low Oil and Gas Supply': "#bcbddc",
-            'Low Oil Price': "#fc9272",
-            'Low Uptake of Inflation Reduction Act': "#aff05b",
-            'Low Zero-Carbon Technology Cost': "#28ea8d",
-            'No Inflation Reduction Act': "#a6611a",
-            'Reference case': "#dfc27d",
-            'Actual': "black",
-            },
-        symbol="edition",
-        log_x=True,
-        labels={indicator: f"{titles_dict.get(indicator,'title not found')} ", "GDP_PER_CAPITA": "real GDP per capita", "edition": "edition", "case_name_labels": "case"},
-        size_max=60,
-        template=template_name,
-        title=f"<b>{titles_dict.get(indicator,'title not found')} vs. Real GDP per capita</b><br>({units_dict.get(test_units,'units not found')})", 
-        )
+    metric_title = error_metrics[metric] + ("" if metric == "rmse" else " (%)")
+    with callback_metrics.phase("build"):
+        fig = error_figure(by_horizon, metric, f"<b>{title_for(indicator)}</b><br>({metric_title} by forecast horizon)",
+                           metric_title, template_registry.template(template_name))
+    # percents to one decimal, rmse to the precision the indicator is published with
+    decimals = {"mape": 1, "bias": 1, "rmse": decimals_for(indicator)}
+    rows = by_edition.drop(columns=["indicator", "case_name"]).astype(
+        {"edition": str, "case_name_labels": str, **{metric: float for metric in error_metrics}})
+    return fig, rows.round({k: v for k, v in decimals.items() if v is not None}).to_dict("records")
 
 
-    fig_scatter.update_traces(textposition="bottom right")
-    fig_scatter.update_layout(yaxis=dict(title=None, exponentformat= None, separatethousands= True, tickfont_size=26), 
-                              xaxis=dict(tickprefix= '$', separatethousands= True, tickfont_size=26) )
-    fig_scatter.for_each_trace(
-        lambda trace: trace.update(marker=dict(size=10, color="black"), line=dict(width=2, color="DarkSlateGrey")) if trace.name == "Actual, 2024" else 
-        (trace.update(marker=dict(size=8), line=dict(width=2, color="DarkSlateGrey"))),)
-    fig_scatter.update_xaxes(showline=True, linewidth=2, linecolor='black')
-
-
-    # Add the annotation text using paper reference. See:
-    # https://stackoverflow.com/questions/76046269/how-to-align-annotation-to-the-edge-of-whole-figure-in-plotly
-    # https://community.plotly.com/t/interactive-app-to-explain-legend-and-annotations-positioning/65160
-    fig_scatter.add_annotation(
-        text = textString,
-        font = {
-            'size' : 14,
-            #'family' : 'Times New Roman',
-            'color': 'gray',
-        },
-        xref = "paper", 
-        yref = "paper",
-        x = -0.01, 
-        y = -0.15,  
-        align='left',
-        showarrow = False
-    )
+@callback(
+    Output("fig-citation", component_property='children'),
+    Input("indicator", "value"),
+)
+def update_citation(indicator):
+    return citation(indicator) if indicator else ""
 
 
-    grid_filter = f"{case_name}.includes(params.data.case_name) && params.data.year >= {yrs[0]} && params.data.year <= {yrs[1]}"
-    dashGridOptions = {
-        "isExternalFilterPresent": {"function": "true"},
-        "doesExternalFilterPass": {"function": grid_filter},
-    }
-    fig_scatter.update_traces(visible='legendonly', selector=dict(name="d")) 
+@callback(
+    Output("grid", "getRowsResponse"),
+    Input("grid", "getRowsRequest"),
+    State("case_names", "value"),
+    State("years", "value"),
+)
+@callback_metrics.instrument("grid_rows")
+def grid_rows(request, case_name, yrs):
+    if request is None:
+        return no_update
+    with callback_metrics.phase("filter"):
+        return data_manager.current.grid_row_model.rows(request, case_name, yrs)
+
 
-    return fig, fig_scatter, dashGridOptions, textString
+# the grid asks for its rows again when the case or year controls change
+clientside_callback(
+    """
+    (case_names, years) => {
+        try {
+            dash_ag_grid.getApi("grid").purgeInfiniteCache();
+        } catch (e) {}
+        return window.dash_clientside.no_update
+    }
+    """,
+    Output("grid", "id"),
+    Input("case_names", "value"),
+    Input("years", "value"),
+    prevent_initial_call=True
+)
 
 
 # updates the Bootstrap global light/dark color mode
@@ -516,37 +840,58 @@ clientside_callback(
     Input("switch", "value"),
 )
 
+# the export is streamed by the server from the in-memory frame instead of the browser's copy of the grid
+def export_data():
+    data = data_manager.current
+    return data.df, data.series_index, data.grid_columns
+
+
+register_export_route(app, export_data, SeriesIndex.key_columns)
+
 clientside_callback(
-    """function (n) {
+    """function (n, indicator, case_names, years) {
         if (n) {
-            dash_ag_grid.getApi("grid").exportDataAsCsv();
+            const params = new URLSearchParams({
+                indicator: indicator, cases: case_names.join(","), start: years[0], end: years[1]
+            });
+            window.location.href = "EXPORT_URL?" + params.toString();
         }
         return dash_clientside.no_update
-    }""",
+    }""".replace("EXPORT_URL", app.get_relative_path("/export")),
     Output("btn-excel-csv", "n_clicks"),
     Input("btn-excel-csv", "n_clicks"),
+    State("indicator", "value"),
+    State("case_names", "value"),
+    State("years", "value"),
     prevent_initial_call=True
 )
 
 
-# This callback makes updating figures with the new theme much faster
-@callback(
+# This callback makes updating figures with the new theme much faster: the browser
+# fetches the template by name from the server once (then revalidates it by ETag) and
+# swaps it into the figures itself, see assets/templates.js
+clientside_callback(
+    ClientsideFunction(namespace="templates", function_name="apply"),
     Output("line-chart", "figure", allow_duplicate=True ),
     Output("scatter-chart", "figure", allow_duplicate=True),
+    Output("error-chart", "figure", allow_duplicate=True),
+    Output("compare-chart", "figure", allow_duplicate=True),
     Input(ThemeChangerAIO.ids.radio("theme"), "value"),
     Input("switch", "value"),
+    State("line-chart", "figure"),
+    State("scatter-chart", "figure"),
+    State("error-chart", "figure"),
+    State("compare-chart", "figure"),
+    State("template-urls", "data"),
     prevent_initial_call=True
 )
-def update_template(theme, color_mode_switch_on):
-    theme_name = template_from_url(theme)
-    template_name = theme_name if color_mode_switch_on else theme_name + "_dark"
-
-    patched_figure = Patch()
-    # When using Patch() to update the figure template, you must use the figure template dict
-    # from plotly.io  and not just the template name
-    patched_figure["layout"]["template"] = pio.templates[template_name]
-    return patched_figure, patched_figure
 
 
+# development server only, see wsgi.py for serving many users; debug mode and
+# hot reload stay off unless DASH_DEBUG=true is set in the environment
 if __name__ == "__main__":
-    app.run_server(debug=True)
\ No newline at end of file
+    # the build processes are forked first, while this is the only thread
+    build_pool.start()
+    data_manager.start()
+    warm_caches(data_manager.current)
+    app.run_server()
\ No newline at end of file
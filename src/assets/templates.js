@@ -0,0 +1,33 @@
+// Applies a Bootstrap figure template to the charts in the browser when the theme
+// or the light/dark switch changes. Templates are fetched by name from the server's
+// templates route (see utils/templates.py) once per page and kept here.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    templates: {
+        loaded: {},
+
+        // called with the figures of the charts, then the template urls; returns the figures
+        apply: async function (theme, switchOn, ...figures) {
+            const templateUrls = figures.pop();
+            const base = templateUrls[theme] || templateUrls.default;
+            const url = base + (switchOn ? "" : "_dark") + ".json";
+
+            const loaded = window.dash_clientside.templates.loaded;
+            if (!loaded[url]) {
+                loaded[url] = fetch(url).then(response => {
+                    if (!response.ok) {
+                        throw new Error("could not load figure template " + url);
+                    }
+                    return response.json();
+                });
+                // a failed request is tried again on the next change
+                loaded[url].catch(() => delete loaded[url]);
+            }
+            const template = await loaded[url];
+
+            const withTemplate = figure => figure && figure.layout
+                ? Object.assign({}, figure, {layout: Object.assign({}, figure.layout, {template: template})})
+                : window.dash_clientside.no_update;
+            return figures.map(withTemplate);
+        }
+    }
+});
@@ -0,0 +1,45 @@
+// Zooms the line chart to the years picked on the slider without a server round trip.
+// The chart holds every year (see with_year_range in utils/figures.py, which sets the
+// same range when a figure is first sent), so only the axis ranges change here.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    figures: {
+        // trace data sent as a typed array spec (see utils/compact.py) or as a plain list
+        decode: function (values) {
+            if (values && values.bdata !== undefined) {
+                const types = {i2: Int16Array, i4: Int32Array, f4: Float32Array, f8: Float64Array};
+                const bytes = Uint8Array.from(atob(values.bdata), c => c.charCodeAt(0));
+                return new types[values.dtype](bytes.buffer);
+            }
+            return values || [];
+        },
+
+        yearRange: function (years, figure) {
+            if (!figure || !figure.data || !figure.data.length) {
+                return window.dash_clientside.no_update;
+            }
+            const [start, end] = years;
+
+            // the y span of the points in view with the 5% padding plotly's autorange adds
+            let low = Infinity, high = -Infinity;
+            const decode = window.dash_clientside.figures.decode;
+            figure.data.forEach(trace => {
+                const x = decode(trace.x), y = decode(trace.y);
+                for (let i = 0; i < x.length; i++) {
+                    if (x[i] >= start && x[i] <= end && y[i] !== null && !isNaN(y[i])) {
+                        low = Math.min(low, y[i]);
+                        high = Math.max(high, y[i]);
+                    }
+                }
+            });
+            const yaxis = Object.assign({}, figure.layout.yaxis);
+            if (low <= high) {
+                const pad = (high - low) * 0.05 || Math.abs(high) * 0.05 || 1;
+                Object.assign(yaxis, {range: [low - pad, high + pad], autorange: false});
+            } else {
+                Object.assign(yaxis, {range: null, autorange: true});
+            }
+            const xaxis = Object.assign({}, figure.layout.xaxis, {range: [start, end], autorange: false});
+            return Object.assign({}, figure, {layout: Object.assign({}, figure.layout, {xaxis: xaxis, yaxis: yaxis})});
+        }
+    }
+});
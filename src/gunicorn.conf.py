@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+# gunicorn settings for wsgi.py, read automatically when gunicorn starts in the src folder.
+# Every value can be overridden on the command line or through the environment.
+
+import multiprocessing
+import os
+
+
+bind = os.environ.get("DASH_BENCHMARK_BIND", "0.0.0.0:8050")
+
+# forked workers each serve several analysts at once on their own threads
+workers = int(os.environ.get("DASH_BENCHMARK_WORKERS", os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() + 1)))
+threads = int(os.environ.get("DASH_BENCHMARK_THREADS", 4))
+worker_class = "gthread"
+
+# load app.py once in the master so the memory-mapped data and the plotly templates
+# are shared copy-on-write by all workers instead of loaded again by each of them
+preload_app = True
+
+timeout = int(os.environ.get("DASH_BENCHMARK_TIMEOUT", 60))
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    # the threads that reload a new csv and warm the figure cache do not survive the fork,
+    # so each worker starts its own; its figure build processes are forked before them
+    from app import build_pool, data_manager, warm_caches
+    build_pool.start()
+    data_manager.start()
+    warm_caches(data_manager.current)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from utils.constants import case_codes, case_name_labels_dict
+
+
+def case_table() -> pd.DataFrame:
+    """The case normalization table: raw code -> case_name, case_name_labels, included."""
+    table = pd.DataFrame.from_dict(case_codes, orient="index", columns=["case_name", "included"])
+    table["case_name_labels"] = table["case_name"].map(case_name_labels_dict)
+    return table[["case_name", "case_name_labels", "included"]]
+
+
+def _recode(categorical: pd.Categorical, values: np.ndarray) -> pd.Categorical:
+    # one new value per category of `categorical`, gathered by its codes; NaN values get code -1
+    inverse, categories = pd.factorize(values, sort=True)
+    return pd.Categorical.from_codes(inverse[categorical.codes], categories)
+
+
+def normalize_cases(df: pd.DataFrame) -> pd.DataFrame:
+    """Recode case_name to the codes shown in the app, add case_name_labels and drop excluded cases.
+
+    Every distinct raw code is looked up once in the table, and the rows are
+    recoded through their categorical codes, so the cost does not grow with
+    the number of rows per code. Codes missing from utils.constants.case_codes,
+    and included codes without a label, are reported with a warning.
+    """
+    raw = pd.Categorical(df["case_name"])
+    table = case_table().reindex(raw.categories)
+
+    unmapped = table.index[table["case_name"].isna()].tolist()
+    if unmapped:
+        warnings.warn(f"case codes missing from utils.constants.case_codes, their rows are dropped: {unmapped}")
+    unlabeled = table.index[table["included"].eq(True) & table["case_name_labels"].isna()].tolist()
+    if unlabeled:
+        warnings.warn(f"case codes without a label in utils.constants.case_name_labels_dict: {unlabeled}")
+
+    # rows without a case have code -1, which picks the appended False
+    included = np.append(table["included"].eq(True).to_numpy(), False)
+    keep = included[raw.codes]
+    df = df.loc[keep].copy()
+    raw = raw[keep]
+    df["case_name"] = _recode(raw, table["case_name"].to_numpy())
+    df["case_name_labels"] = _recode(raw, table["case_name_labels"].to_numpy())
+    return df
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import gzip
+import os
+
+import numpy as np
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# opt-in: DASH_BENCHMARK_COMPACT_FIGURES=1 rounds trace data to its published precision
+# and compresses json responses, =typed also sends trace data as base64 typed arrays
+# (see compact_figure and register_response_compression)
+COMPACT_FIGURES_ENV = "DASH_BENCHMARK_COMPACT_FIGURES"
+
+compressible_types = ("application/json", "text/html")
+
+int16 = np.iinfo(np.int16)
+
+
+def compact_mode() -> str:
+    """"typed", "round" or "" (off), from DASH_BENCHMARK_COMPACT_FIGURES."""
+    value = os.environ.get(COMPACT_FIGURES_ENV, "").lower()
+    if value in ("", "0", "false", "no"):
+        return ""
+    return "typed" if value == "typed" else "round"
+
+
+def typed_array(values: np.ndarray, dtype: str) -> dict:
+    # plotly.js (2.28 and later) decodes {dtype, bdata} specs into typed arrays
+    dtype = np.dtype(dtype).newbyteorder("<")
+    data = np.ascontiguousarray(values, dtype=dtype)
+    return {"dtype": dtype.str[1:], "bdata": base64.b64encode(data.tobytes()).decode()}
+
+
+def decode_array(values) -> np.ndarray:
+    """Trace data as a float array, whether it is a typed array spec or a plain list."""
+    if isinstance(values, dict) and "bdata" in values:
+        data = np.frombuffer(base64.b64decode(values["bdata"]), dtype="<" + values["dtype"])
+        return data.astype(float)
+    return np.asarray(values if values is not None else [], dtype=float)
+
+
+def encode_array(values, decimals: int = None, typed: bool = True):
+    try:
+        data = np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        # text or dates are sent as they are
+        return values
+    if data.ndim != 1 or not len(data):
+        return values
+
+    if not typed:
+        if decimals is None:
+            return values
+        return [None if np.isnan(v) else v for v in np.round(data, decimals).tolist()]
+    if np.isfinite(data).all() and (data == np.round(data)).all() and int16.min <= data.min() and data.max() <= int16.max:
+        # whole numbers such as the years take 2 bytes each
+        return typed_array(data, "i2")
+    if decimals is not None:
+        data = np.round(data, decimals)
+    return typed_array(data, "f4")
+
+
+def compact_figure(figure: dict, decimals: dict, typed: bool = False) -> dict:
+    """The plain figure with the x and y data of each trace rounded to `decimals[axis]` places.
+
+    Rounded values compress best, so by default they stay json lists. With
+    `typed` they are sent as base64 typed arrays instead: whole numbers in the
+    int16 range (the years) as int16, everything else as float32. That is
+    smaller and quicker to parse uncompressed, but random float bits compress
+    poorly. None in `decimals` leaves an axis unrounded. Missing values become
+    NaN in typed arrays, which plotly draws as gaps like null.
+    """
+    data = []
+    for trace in figure.get("data", []):
+        trace = dict(trace)
+        for axis in ("x", "y"):
+            if axis in trace:
+                trace[axis] = encode_array(trace[axis], decimals.get(axis), typed)
+        data.append(trace)
+    return dict(figure, data=data)
+
+
+def register_response_compression(server, min_size: int = 1024, level: int = 5):
+    """Compress json and html responses with brotli, or gzip, as the browser accepts.
+
+    Streamed responses (the csv export gzips its own chunks) and responses
+    below `min_size` bytes are sent as they are.
+    """
+
+    @server.after_request
+    def compress(response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers or response.mimetype not in compressible_types):
+            return response
+        accept = request.headers.get("Accept-Encoding", "")
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        if brotli and "br" in accept:
+            response.set_data(brotli.compress(data, quality=level))
+            response.headers["Content-Encoding"] = "br"
+        elif "gzip" in accept:
+            response.set_data(gzip.compress(data, compresslevel=level))
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        # the compressed body is a different representation of the same resource
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    return compress
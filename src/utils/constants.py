@@ -163,6 +163,25 @@ units_dict = {
     'TRLCF': 'trillion cubic feet', # keep
 }
 
+# decimal places each unit is published with, the precision compact figures are rounded to
+units_decimals = {
+    'BLNKWH': 1,
+    'MILLBRLPDY': 2,
+    'MILLMTCO2EQ': 1,
+    'MILLTON': 1,
+    'NCNTPKWH': 2,
+    'NDLRPBRL': 2,
+    'NDLRPMCF': 2,
+    'NDLRPMBTU': 2,
+    'RCNTPKWH': 2,
+    'RDLRPBRL': 2,
+    'RDLRPMCF': 2,
+    'RDLRPMBTU': 2,
+    'QBTU': 2,
+    'THBTUPDLRGDP': 3,
+    'TRLCF': 2,
+}
+
 case_name_labels_dict = {
     'ACTUAL': 'Actual',
     'HEUR12': 'Oil and Gas: High Shale EUR',
@@ -197,6 +216,70 @@ case_name_labels_dict = {
     'REFERENCE': 'Reference case',
 }
 
+# every case code found in the data: raw code -> (code shown in the app, included in the review).
+# We standardize the data because of case/scenario labeling in EIA API v2, e.g. REF2025 is
+# shown as REFERENCE, and labels are looked up by the shown code in case_name_labels_dict.
+# Codes that are missing here are reported, and dropped, when the csv is ingested
+case_codes = {
+    'ACTUAL': ('ACTUAL', True),
+    'HEUR': ('HEUR', True),
+    'HIGHMACHIGHZTC': ('HIGHMACHIGHZTC', True),
+    'HIGHMACLOWZTC': ('HIGHMACLOWZTC', True),
+    'HIGHMACRO': ('HIGHMACRO', True),
+    'HM2010': ('HIGHMACRO', True),
+    'HM2011': ('HIGHMACRO', True),
+    'HM2012': ('HIGHMACRO', True),
+    'HIGHOGS': ('HIGHOGS', True),
+    'HIGHPRICE': ('HIGHPRICE', True),
+    'HP2010': ('HIGHPRICE', True),
+    'HP2011HNO': ('HIGHPRICE', True),
+    'HP2012': ('HIGHPRICE', True),
+    'HIGHRESOURCE': ('HIGHRESOURCE', True),
+    'HIGHUPIRA': ('HIGHUPIRA', True),
+    'HIGHZTC': ('HIGHZTC', True),
+    'HSHLEUR': ('HSHLEUR', True),
+    'HEUR12': ('HSHLEUR', True),
+    'LOWMACHIGHZTC': ('LOWMACHIGHZTC', True),
+    'LOWMACLOWZTC': ('LOWMACLOWZTC', True),
+    'LOWMACRO': ('LOWMACRO', True),
+    'LM2010': ('LOWMACRO', True),
+    'LM2011': ('LOWMACRO', True),
+    'LM2012': ('LOWMACRO', True),
+    'LOWOGS': ('LOWOGS', True),
+    'LOWPRICE': ('LOWPRICE', True),
+    'LP2010': ('LOWPRICE', True),
+    'LP2011LNO': ('LOWPRICE', True),
+    'LP2012': ('LOWPRICE', True),
+    'LOWRESOURCE': ('LOWRESOURCE', True),
+    'LOWUPIRA': ('LOWUPIRA', True),
+    'LOWZTC': ('LOWZTC', True),
+    'LSHLEUR': ('LSHLEUR', True),
+    'LEUR12': ('LSHLEUR', True),
+    'NOIRA': ('NOIRA', True),
+    'REFERENCE': ('REFERENCE', True),
+    'REF2005': ('REFERENCE', True),
+    'REF2006': ('REFERENCE', True),
+    'REF2007': ('REFERENCE', True),
+    'REF2008': ('REFERENCE', True),
+    'REF2009': ('REFERENCE', True),
+    'REF2010': ('REFERENCE', True),
+    'REF2010R': ('REFERENCE', True),
+    'REF2011': ('REFERENCE', True),
+    'REF2012': ('REFERENCE', True),
+    'REF2013': ('REFERENCE', True),
+    'REF2014': ('REFERENCE', True),
+    'REF2015': ('REFERENCE', True),
+    'REF2016': ('REFERENCE', True),
+    'REF2017': ('REFERENCE', True),
+    'REF2018': ('REFERENCE', True),
+    'REF2019': ('REFERENCE', True),
+    'REF2020': ('REFERENCE', True),
+    'REF2021': ('REFERENCE', True),
+    'REF2022': ('REFERENCE', True),
+    'REF2023': ('REFERENCE', True),
+    'REF2025': ('REFERENCE', True),
+}
+
 sources_dict = {
     'ECI_NA_NA_NA_GDP_REAL_NA_BLNY09DLR': "Data source: Historical data are from the U.S. Energy Information Administration open data Application Programming Interface (API) (accessed June 2024; https://www.eia.gov/opendata/browser/total-energy), annual series: GDPRVUS; projections: Annual Energy Outlook, case projections from various editions",
     'PRCE_NA_NA_NA_CR_IMCO_USA_NDLRPBRL': "Data source: Historical data are from the U.S. Energy Information Administration open data Application Programming Interface (API) (accessed June 2024; https://www.eia.gov/opendata/browser/total-energy), annual series: RAIMUUS; projections: Annual Energy Outlook, case projections from various editions",
@@ -332,4 +415,27 @@ colors_dict ={
     'dhs-green-20': 'rgba(210,226,198,1)',
     'dhs-green-15': 'rgba(229,238,222,1)',
     'dhs-green-10': 'rgba(249,251,247,1)',
-}
\ No newline at end of file
+}
+
+# line colors of the AEO editions in the line chart, as keys of colors_dict
+edition_colors_dict = {
+    '2005': 'dhs-dark-gray-70',
+    '2006': 'dhs-dark-gray-60',
+    '2007': 'dhs-dark-gray-40',
+    '2008': 'dhs-dark-gray-30',
+    '2009': 'dhs-dark-gray-20',
+    '2010': 'dhs-green-70',
+    '2011': 'dhs-green-60',
+    '2012': 'dhs-green-40',
+    '2013': 'dhs-green-30',
+    '2014': 'dhs-green-20',
+    '2015': 'dhs-red-70',
+    '2016': 'dhs-red-60',
+    '2017': 'dhs-red-40',
+    '2018': 'dhs-red-30',
+    '2019': 'dhs-red-20',
+    '2020': 'dhs-light-blue-70',
+    '2021': 'dhs-light-blue-60',
+    '2022': 'dhs-light-blue-40',
+    '2023': 'dhs-light-blue-30',
+}
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+
+from utils.constants import case_name_labels_dict, indicators
+from utils.schema import value_dtype, widen
+
+
+def case_axis(case_names) -> list:
+    """The codes in `case_names` in the order of case_name_labels_dict, then any code it has no label for."""
+    case_names = set(map(str, case_names))
+    axis = [code for code in case_name_labels_dict if code in case_names]
+    return axis + sorted(case_names - set(axis))
+
+
+class BenchmarkCube:
+    """The indicators of the cleaned frame as one dense (indicator x edition x case x year) array.
+
+    The array is float32, like the frame, with NaN where a series has no
+    value. Indicators follow utils.constants.indicators and the cases of the
+    data the order of case_name_labels_dict; editions and years are those of
+    the data, the years without gaps (cases and editions the data lacks would
+    only be NaN, so they get no slot). Selecting single labels with `select` is basic
+    indexing, so the result is a view of the cube and costs nothing however
+    large the cube is; lists of labels are gathered into a copy.
+
+    The cube answers cross-sections the row layout cannot answer cheaply,
+    e.g. every edition and case for one year:
+
+        cube.select("EMI_CO2_NA_NA_NA_NA_NA_MILLMTCO2EQ", year=2030)  # (edition x case) view
+
+    `present` marks the (edition, case, year) cells that have a row in the
+    data, so `frame` gives back the rows of a selection as SeriesIndex.frame
+    does. Most of the cube is NaN, which is why it only holds the charted
+    indicators and not the derived columns.
+    """
+
+    axes = ("indicator", "edition", "case_name", "year")
+    key_columns = ["edition", "case_name", "case_name_labels", "year"]
+
+    def __init__(self, df: pd.DataFrame, columns: list = None):
+        self.indicators = [c for c in (columns or indicators) if c in df.columns]
+        self.editions = sorted(map(str, df["edition"].unique()))
+        self.cases = case_axis(df["case_name"].unique())
+        self.years = np.arange(df["year"].min(), df["year"].max() + 1)
+
+        self.indicator_index = {label: i for i, label in enumerate(self.indicators)}
+        self.edition_index = {label: i for i, label in enumerate(self.editions)}
+        self.case_index = {label: i for i, label in enumerate(self.cases)}
+
+        edition = pd.Categorical(df["edition"].astype(str), categories=self.editions).codes
+        case = pd.Categorical(df["case_name"].astype(str), categories=self.cases).codes
+        year = df["year"].to_numpy().astype(np.intp) - self.years[0]
+
+        self.values = np.full((len(self.indicators), len(self.editions), len(self.cases), len(self.years)),
+                              np.nan, dtype=value_dtype)
+        # one scatter of every row into the cube; a (edition, case, year) appears once in the data
+        self.values[:, edition, case, year] = df[self.indicators].to_numpy(dtype=value_dtype).T
+        self.present = np.zeros(self.values.shape[1:], dtype=bool)
+        self.present[edition, case, year] = True
+
+        # the key columns of `frame` get the dtypes of the frame; these are the category codes of each slot
+        self._dtypes = {name: df[name].dtype for name in self.key_columns}
+        labels = dict(zip(df["case_name"].astype(str), df["case_name_labels"].astype(str)))
+        self._codes = {
+            "edition": self._category_codes("edition", self.editions),
+            "case_name": self._category_codes("case_name", self.cases),
+            "case_name_labels": self._category_codes("case_name_labels", [labels[c] for c in self.cases]),
+        }
+
+    def _category_codes(self, name: str, labels: list) -> np.ndarray:
+        categories = self._dtypes[name].categories.astype(str)
+        return np.array([categories.get_loc(label) for label in labels], dtype=np.intp)
+
+    @property
+    def edition_years(self) -> np.ndarray:
+        return np.array(self.editions, dtype=int)
+
+    def _position(self, axis: str, label):
+        if label is None:
+            return slice(None)
+        if axis == "year":
+            index = lambda year: int(year) - int(self.years[0])
+        else:
+            labels = {"indicator": self.indicator_index, "edition": self.edition_index, "case_name": self.case_index}[axis]
+            index = labels.__getitem__
+        if isinstance(label, slice):
+            # label slices include both ends, like the year slider
+            start = index(label.start) if label.start is not None else None
+            stop = index(label.stop) + 1 if label.stop is not None else None
+            return slice(start, stop)
+        if isinstance(label, (list, tuple, np.ndarray)):
+            return [index(l) for l in label]
+        return index(label)
+
+    def select(self, indicator=None, edition=None, case_name=None, year=None) -> np.ndarray:
+        """Values for the given labels; None keeps an axis, a single label drops it.
+
+        Single labels and slices (e.g. year=slice(2020, 2030)) return a view.
+        At most one axis may be given a list of labels, which returns a copy.
+        A label that is not in the cube raises KeyError.
+        """
+        positions = tuple(self._position(axis, label)
+                          for axis, label in zip(self.axes, (indicator, edition, case_name, year)))
+        return self.values[positions]
+
+    def frame(self, columns: list, case_names: list, years: list = None) -> pd.DataFrame:
+        """The rows of `case_names` in the year range `years`, with the key columns plus `columns`.
+
+        The same rows and dtypes as SeriesIndex.frame, in (edition, case, year)
+        order. Only the cells in the selection are visited, however many rows
+        the data has.
+        """
+        cases = np.array([self.case_index[c] for c in dict.fromkeys(case_names) if c in self.case_index], dtype=np.intp)
+        first = 0 if years is None else max(0, int(years[0]) - int(self.years[0]))
+        last = len(self.years) if years is None else max(first, int(years[1]) - int(self.years[0]) + 1)
+        e, c, y = np.nonzero(self.present[:, cases, first:last])
+        c, y = cases[c], y + first
+
+        df = pd.DataFrame({name: pd.Categorical.from_codes(codes[e if name == "edition" else c],
+                                                           dtype=self._dtypes[name])
+                           for name, codes in self._codes.items()})
+        df["year"] = self.years[y].astype(self._dtypes["year"])
+        for column in columns:
+            df[column] = widen(self.values[self.indicator_index[column], e, c, y])
+        return df
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import warnings
+from pathlib import Path
+
+from utils.data_store import data_version
+
+
+# seconds between checks of the data folder for a new or changed csv, 0 turns reloading off
+RELOAD_INTERVAL_ENV = "DASH_BENCHMARK_RELOAD_INTERVAL"
+
+default_reload_interval = 30.0
+
+
+def latest_data_file(path: Path, pattern: str) -> Path:
+    # the most recently modified csv matching `pattern` next to `path`, e.g. a new
+    # eia-aeo-mer-benchmark-*.csv dropped in beside the one the app started with
+    candidates = [p for p in Path(path).parent.glob(pattern) if p.is_file()] or [Path(path)]
+    return max(candidates, key=lambda p: (p.stat().st_mtime_ns, p.name))
+
+
+class DataManager:
+    """Holds the current build of the benchmark data and swaps in a new one when the csv changes.
+
+    `build(path, generation)` returns everything the callbacks need for one
+    csv (the frame, its indexes, a figure cache, ...). The first build runs in
+    the constructor. After `start`, a daemon thread checks the data folder every
+    `interval` seconds and builds the new data in the background, while the old
+    build keeps serving. The finished build replaces `current` in a single
+    assignment and the generation counter goes up by one, so a callback that
+    reads `current` once sees either the old or the new data, never a mix.
+
+    A csv is only loaded once its size and modification time were the same in
+    two checks in a row, so a file that is still being copied is not read.
+    A build that fails leaves the current data in place and is retried when
+    the file changes again, or on the next check if it failed reading a file.
+    Functions passed to `subscribe` are called with each new build once it
+    is current.
+    """
+
+    def __init__(self, path: Path, build, pattern: str = None, interval: float = None):
+        self.pattern = pattern
+        if interval is None:
+            interval = float(os.environ.get(RELOAD_INTERVAL_ENV, default_reload_interval))
+        self.interval = interval
+        self.build = build
+        self.generation = 1
+        self.path = Path(path)
+        self.version = data_version(self.path)
+        self.current = build(self.path, self.generation)
+
+        self._seen = None
+        self._failed = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._listeners = []
+
+    def _candidate(self):
+        path = latest_data_file(self.path, self.pattern) if self.pattern else self.path
+        return path, data_version(path)
+
+    def check(self) -> bool:
+        """Build and swap in the data if the csv changed and has settled; True if it did."""
+        with self._lock:
+            try:
+                candidate = self._candidate()
+            except OSError:
+                # the file is being replaced right now
+                return False
+            seen, self._seen = self._seen, candidate
+            if candidate in ((self.path, self.version), self._failed) or candidate != seen:
+                return False
+
+            path, version = candidate
+            try:
+                data = self.build(path, self.generation + 1)
+            except Exception as error:
+                warnings.warn(f"could not load {path}, still serving {self.path}: {error!r}")
+                if not isinstance(error, OSError):
+                    # not retried until the file changes again; a file that went
+                    # missing or was swapped out under us is retried on the next check
+                    self._failed = candidate
+                return False
+
+            self.path, self.version = path, version
+            self.generation += 1
+            self.current = data
+        for listener in self._listeners:
+            try:
+                listener(data)
+            except Exception as error:
+                warnings.warn(f"{listener!r} failed for {path}: {error!r}")
+        return True
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        # threads do not survive a fork, so gunicorn workers call this after forking
+        if self.interval > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="data-manager", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
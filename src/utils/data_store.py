@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.cases import normalize_cases
+from utils.derived import add_derived_metrics
+from utils.schema import apply_schema, csv_columns
+
+try:
+    import fcntl
+except ImportError:
+    # Windows; workers there may parse the csv and write the cache at the same time
+    fcntl = None
+
+
+# bump this whenever the cleaning steps or the on-disk layout change so that
+# caches written by an older version of the app are rebuilt on the next start
+CACHE_VERSION = 3
+
+
+def clean_benchmark_data(df: pd.DataFrame) -> pd.DataFrame:
+    df['edition'] = df['edition'].astype(str)
+    # we keep the columns declared in utils.schema, which also drops the csv's unnamed index column
+    df = df[[c for c in df.columns if csv_columns(c)]]
+
+    # we standardize the case codes because of case/scenario labeling in EIA API v2, label
+    # them and focus on certain scenarios or side cases in the review, see utils.constants.case_codes
+    df = normalize_cases(df)
+
+    # per-capita and per-GDP ratios are stored with the data so callbacks never compute them;
+    # they are computed in float64 before the frame is cast to its lean dtypes
+    return apply_schema(add_derived_metrics(df.reset_index(drop=True)))
+
+
+def read_benchmark_csv(path: Path) -> pd.DataFrame:
+    return clean_benchmark_data(pd.read_csv(path, usecols=csv_columns))
+
+
+def cache_dir_for(csv_path: Path) -> Path:
+    # the cache lives next to the csv, e.g. data/.eia-aeo-mer-benchmark-nov2024.cache/
+    return csv_path.with_name(f".{csv_path.stem}.cache")
+
+
+def _source_stamp(csv_path: Path) -> dict:
+    stat = csv_path.stat()
+    return {"name": csv_path.name, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def data_version(csv_path: Path) -> str:
+    # changes whenever the csv or the cleaning steps do; used to namespace derived caches
+    stamp = _source_stamp(Path(csv_path))
+    return f"{CACHE_VERSION}-{stamp['mtime_ns']}-{stamp['size']}"
+
+
+def write_cache(df: pd.DataFrame, cache_dir: Path, source: dict = None) -> Path:
+    """Write the cleaned frame as one .npy file per column group.
+
+    Float columns are stored together as a single float32 (columns x rows) block
+    so that the loaded frame is backed by one memory-mapped array. Integer columns keep
+    their own typed array and text columns are stored as categorical codes plus
+    their categories.
+    """
+    cache_dir = Path(cache_dir)
+    tmp_dir = cache_dir.with_name(f"{cache_dir.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    columns = []
+    float_columns = [c for c in df.columns if pd.api.types.is_float_dtype(df[c])]
+    for name in df.columns:
+        col = df[name]
+        if name in float_columns:
+            columns.append({"name": name, "kind": "float"})
+        elif pd.api.types.is_integer_dtype(col):
+            np.save(tmp_dir / f"{len(columns)}.npy", col.to_numpy())
+            columns.append({"name": name, "kind": "int"})
+        else:
+            col = col.astype("category")
+            if name == "edition":
+                col = col.cat.reorder_categories(sorted(col.cat.categories), ordered=True)
+            np.save(tmp_dir / f"{len(columns)}.npy", col.cat.codes.to_numpy())
+            columns.append({"name": name, "kind": "category",
+                            "categories": [str(c) for c in col.cat.categories],
+                            "ordered": bool(col.cat.ordered)})
+
+    block = np.ascontiguousarray(df[float_columns].to_numpy(dtype=np.float32).T)
+    np.save(tmp_dir / "float.npy", block)
+
+    meta = {"version": CACHE_VERSION, "rows": len(df), "columns": columns, "source": source}
+    (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=1))
+
+    # swap the finished directory in so a reader never sees a partial cache;
+    # workers that still map the old files keep them alive until they close
+    old_dir = cache_dir.with_name(f"{cache_dir.name}.old{os.getpid()}")
+    if cache_dir.exists():
+        cache_dir.rename(old_dir)
+    tmp_dir.rename(cache_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return cache_dir
+
+
+def read_cache(cache_dir: Path, mmap_mode: str = "r") -> pd.DataFrame:
+    cache_dir = Path(cache_dir)
+    meta = json.loads((cache_dir / "meta.json").read_text())
+
+    block = np.load(cache_dir / "float.npy", mmap_mode=mmap_mode)
+    float_names = [c["name"] for c in meta["columns"] if c["kind"] == "float"]
+    # the transposed block already has pandas' internal (columns x rows) layout,
+    # so the float columns are views on the mapped file and not copies
+    df = pd.DataFrame(block.T, columns=float_names, copy=False)
+
+    for loc, col in enumerate(meta["columns"]):
+        if col["kind"] == "float":
+            continue
+        values = np.load(cache_dir / f"{loc}.npy", mmap_mode=mmap_mode)
+        if col["kind"] == "category":
+            values = pd.Categorical.from_codes(values, categories=col["categories"], ordered=col["ordered"])
+        df.insert(loc, col["name"], values)
+    return df
+
+
+def cache_is_fresh(csv_path: Path, cache_dir: Path) -> bool:
+    try:
+        meta = json.loads((Path(cache_dir) / "meta.json").read_text())
+    except (OSError, ValueError):
+        return False
+    return meta.get("version") == CACHE_VERSION and meta.get("source") == _source_stamp(csv_path)
+
+
+@contextmanager
+def cache_lock(cache_dir: Path):
+    """Hold an exclusive lock on the cache of one csv, so only one process writes it.
+
+    The lock is a file next to the cache directory. Where the lock file cannot
+    be created (a read-only data folder) or locking is not available, the
+    block runs without it.
+    """
+    try:
+        lock = open(Path(cache_dir).with_name(f"{Path(cache_dir).name}.lock"), "a")
+    except OSError:
+        yield
+        return
+    with lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def load_benchmark_data(csv_path: Path, cache_dir: Path = None) -> pd.DataFrame:
+    """Return the cleaned benchmark frame, preferring the columnar cache.
+
+    The cache is used when it was written from the csv as it is on disk now
+    (same name, size and modification time); otherwise the csv is parsed,
+    cleaned and the cache is rewritten for the next worker. Workers starting
+    together wait for the one writing the cache and then map what it wrote.
+    """
+    csv_path = Path(csv_path)
+    cache_dir = Path(cache_dir) if cache_dir else cache_dir_for(csv_path)
+
+    if cache_is_fresh(csv_path, cache_dir):
+        try:
+            return read_cache(cache_dir)
+        except OSError:
+            # swapped out by another process while we read it
+            pass
+
+    with cache_lock(cache_dir):
+        # another worker may have written it while we waited for the lock
+        if cache_is_fresh(csv_path, cache_dir):
+            try:
+                return read_cache(cache_dir)
+            except OSError:
+                pass
+
+        df = read_benchmark_csv(csv_path)
+        try:
+            write_cache(df, cache_dir, source=_source_stamp(csv_path))
+            return read_cache(cache_dir)
+        except OSError:
+            # a read-only data folder should not stop the app, we just keep parsing the csv
+            return df
+
+
+if __name__ == "__main__":
+    # ingest step, run from the src folder before starting the workers:
+    #   python -m utils.data_store data/eia-aeo-mer-benchmark-nov2024.csv
+    for arg in sys.argv[1:]:
+        csv_path = Path(arg)
+        with cache_lock(cache_dir_for(csv_path)):
+            cache_dir = write_cache(read_benchmark_csv(csv_path), cache_dir_for(csv_path),
+                                    source=_source_stamp(csv_path))
+        print(f"wrote {cache_dir}")
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+
+from utils.constants import indicators, titles_dict, units_dict, units_decimals, sources_dict
+
+
+POPULATION = 'DMG_POP_NA_NA_NA_NA_NA_MILL'
+REAL_GDP = 'ECI_NA_NA_NA_GDP_REAL_NA_BLNY09DLR'
+GDP_PER_CAPITA = 'GDP_PER_CAPITA'
+
+# derived columns are named after the indicator they come from, e.g.
+# PCAP_GEN_NA_ALLS_NA_SLR_NA_NA_BLNKWH is solar generation per capita
+PER_CAPITA_PREFIX = 'PCAP_'
+PER_GDP_PREFIX = 'PGDP_'
+
+
+def per_capita(indicator: str) -> str:
+    return PER_CAPITA_PREFIX + indicator
+
+
+def per_gdp(indicator: str) -> str:
+    return PER_GDP_PREFIX + indicator
+
+
+def base_indicator(column: str) -> str:
+    for prefix in (PER_CAPITA_PREFIX, PER_GDP_PREFIX):
+        if column.startswith(prefix):
+            return column[len(prefix):]
+    return column
+
+
+def is_derived(column: str) -> bool:
+    return column == GDP_PER_CAPITA or base_indicator(column) != column
+
+
+def add_derived_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """Append per-capita, per-GDP-dollar and GDP per capita columns to the cleaned frame.
+
+    All ratios are computed in one vectorized division per denominator, once
+    at ingest, so they are stored in the data cache like any other indicator.
+    """
+    columns = [i for i in indicators if i in df.columns]
+    population = df[POPULATION]
+    real_gdp = df[REAL_GDP]
+
+    derived = pd.concat(
+        [
+            df[columns].div(population, axis=0).add_prefix(PER_CAPITA_PREFIX),
+            df[columns].div(real_gdp, axis=0).add_prefix(PER_GDP_PREFIX),
+            real_gdp.div(population).mul(1000).rename(GDP_PER_CAPITA),
+        ],
+        axis=1,
+    )
+    return pd.concat([df, derived], axis=1)
+
+
+def title_for(column: str) -> str:
+    title = titles_dict.get(base_indicator(column), 'title not found')
+    if column.startswith(PER_CAPITA_PREFIX):
+        return f"{title} per capita"
+    if column.startswith(PER_GDP_PREFIX):
+        return f"{title} per dollar of real GDP"
+    if column == GDP_PER_CAPITA:
+        return "Real GDP per capita"
+    return title
+
+
+def units_for(column: str) -> str:
+    if column == GDP_PER_CAPITA:
+        return "real 2009 dollars per person"
+    units = units_dict.get(base_indicator(column).rsplit('_',1)[-1], 'units not found')
+    if column.startswith(PER_CAPITA_PREFIX):
+        return f"{units} per million people"
+    if column.startswith(PER_GDP_PREFIX):
+        return f"{units} per billion 2009 dollars of real GDP"
+    return units
+
+
+def decimals_for(column: str):
+    # ratios have no published precision and are left unrounded (None)
+    if column == GDP_PER_CAPITA:
+        return 0
+    if is_derived(column):
+        return None
+    return units_decimals.get(column.rsplit('_',1)[-1])
+
+
+def source_for(column: str) -> str:
+    return sources_dict.get(base_indicator(column), 'not found')
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import io
+import re
+import zlib
+
+import numpy as np
+from flask import Response, abort, request, stream_with_context
+
+
+chunk_rows = 5000
+
+
+def csv_chunks(df, positions: np.ndarray, columns: list, compress: bool = False):
+    """Yield the selected rows as csv, `chunk_rows` rows at a time, optionally gzipped."""
+    col_idx = df.columns.get_indexer(columns)
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    for start in range(0, max(len(positions), 1), chunk_rows):
+        block = df.iloc[positions[start:start + chunk_rows], col_idx]
+        data = block.to_csv(index=False, header=start == 0, lineterminator="\n").encode()
+        if gzip:
+            data = gzip.compress(data)
+        if data:
+            yield data
+    if gzip:
+        yield gzip.flush()
+
+
+def parquet_bytes(df, positions: np.ndarray, columns: list) -> bytes:
+    # parquet needs pyarrow (or fastparquet), which the app does not require otherwise
+    buffer = io.BytesIO()
+    df.iloc[positions, df.columns.get_indexer(columns)].to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def register_export_route(app, get_data, key_columns: list):
+    """Add a download route for the current selection to the app's Flask server.
+
+    `get_data` returns the cleaned frame, its series index and the default
+    columns at request time, all from the same load of the data.
+    Query arguments: indicator (optional, otherwise all `default_columns`),
+    cases (comma separated), start, end, format (csv or parquet) and gzip=1.
+    """
+
+    @app.server.route(app.config.routes_pathname_prefix + "export")
+    def export():
+        df, series_index, default_columns = get_data()
+
+        indicator = request.args.get("indicator")
+        if indicator and indicator not in df.columns:
+            abort(400, f"unknown indicator {indicator}")
+        columns = key_columns + [indicator] if indicator else default_columns
+        case_names = [c for c in request.args.get("cases", "").split(",") if c]
+        years = [request.args.get("start", type=int), request.args.get("end", type=int)]
+        if None in years:
+            years = None
+        positions = np.sort(series_index.positions(case_names, years))
+
+        name = re.sub(r"[^A-Za-z0-9_.-]", "", f"eia-aeo-mer-benchmark-{indicator or 'all'}")
+        if request.args.get("format") == "parquet":
+            try:
+                data = parquet_bytes(df, positions, columns)
+            except ImportError:
+                abort(501, "parquet export needs pyarrow installed on the server")
+            return Response(data, mimetype="application/vnd.apache.parquet",
+                            headers={"Content-Disposition": f"attachment; filename={name}.parquet"})
+
+        compress = request.args.get("gzip") == "1"
+        filename = f"{name}.csv.gz" if compress else f"{name}.csv"
+        return Response(stream_with_context(csv_chunks(df, positions, columns, compress)),
+                        mimetype="application/gzip" if compress else "text/csv",
+                        headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+    return export
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import plotly.io as pio
+
+
+# the on-disk tier that all gunicorn workers share lives in the system temp folder
+# unless this points elsewhere, e.g. a shared-memory mount:
+#   DASH_BENCHMARK_FIGURE_CACHE=/dev/shm/dash-benchmark-figures
+FIGURE_CACHE_ENV = "DASH_BENCHMARK_FIGURE_CACHE"
+
+default_cache_dir = Path(tempfile.gettempdir()) / "dash-benchmark-figures"
+
+
+def to_plain(figure) -> dict:
+    # a figure as plain lists and dicts, which is what Dash sends to the browser anyway
+    return json.loads(pio.to_json(figure, validate=False))
+
+
+def _mtime(entry) -> int:
+    try:
+        return entry.stat().st_mtime_ns
+    except OSError:
+        # another worker removed the file already
+        return 0
+
+
+class FigureCache:
+    """Size-bounded LRU cache for built figures with hit/miss counters.
+
+    Entries live in process memory and, when `directory` is given, also as json
+    files in that folder so a figure built by one worker is reused by the others.
+    The disk tier evicts the least recently used files once it holds more than
+    `disk_maxsize` of them. `namespace` should change whenever the data does, so
+    that figures built from an older csv are never served.
+    """
+
+    def __init__(self, maxsize: int = 128, directory: Path = None, disk_maxsize: int = 1024,
+                 namespace: str = ""):
+        self.maxsize = maxsize
+        self.disk_maxsize = disk_maxsize
+        self.directory = Path(directory) if directory else None
+        self.namespace = namespace
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if self.directory:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+            except OSError:
+                self.directory = None
+
+    @staticmethod
+    def key(chart: str, indicator: str, case_names: list, years: list, template: str) -> tuple:
+        # the dropdown returns cases in click order and the slider may send floats
+        return (chart, indicator, tuple(sorted(case_names)), (int(years[0]), int(years[1])), template)
+
+    def _path(self, key) -> Path:
+        digest = hashlib.sha1(repr((self.namespace, key)).encode()).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        if self.directory:
+            path = self._path(key)
+            try:
+                value = json.loads(path.read_text())
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                # touching the file keeps it at the recent end of the disk LRU
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        self._remember(key, value)
+        if self.directory:
+            path = self._path(key)
+            tmp_path = path.with_suffix(f".tmp{os.getpid()}.{threading.get_ident()}")
+            try:
+                tmp_path.write_text(json.dumps(value))
+                os.replace(tmp_path, path)
+                self._evict_disk()
+            except OSError:
+                pass
+        return value
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _evict_disk(self):
+        files = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+        if len(files) <= self.disk_maxsize:
+            return
+        files.sort(key=_mtime)
+        for entry in files[:len(files) - self.disk_maxsize]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
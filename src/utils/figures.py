@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objs as go
+from dash import Patch
+
+from utils.compact import decode_array
+from utils.constants import colors_dict, edition_colors_dict
+
+
+# final line style of each edition; editions without an entry take the template colorway
+edition_line_styles = {edition: dict(color=colors_dict.get(name)) for edition, name in edition_colors_dict.items()}
+# the MER actuals are published with the 2024 edition and stand out in black
+edition_line_styles['2024'] = dict(color="black", width=4)
+
+axis_font = dict(size=26)
+
+
+def template_colorway(template: go.layout.Template) -> list:
+    # the same fallback plotly express uses when a template has no colorway
+    colorway = template.layout.colorway
+    return list(colorway) if colorway else px.colors.qualitative.D3
+
+
+def line_traces(dff: pd.DataFrame, indicator: str, colorway: list) -> list:
+    """One go.Scatter per (edition, case) series, styled as it is created.
+
+    The rows are sorted by edition and case label and split at the group
+    boundaries with numpy, so building the traces is a single pass over the
+    data and no trace is touched again after it is created.
+    """
+    dff = dff.sort_values(by=["edition","case_name_labels"],ascending=True)
+    edition = dff["edition"].astype(str).to_numpy()
+    case = dff["case_name_labels"].astype(str).to_numpy()
+    x = dff["year"].to_numpy()
+    y = dff[indicator].to_numpy()
+
+    changed = (edition[1:] != edition[:-1]) | (case[1:] != case[:-1])
+    starts = np.flatnonzero(np.r_[True, changed]) if len(dff) else np.array([], dtype=int)
+    ends = np.r_[starts[1:], len(dff)]
+
+    # like color="edition" and line_group="case_name_labels" in px.line, editions take
+    # colors and traces are ordered by first appearance of the edition, then of the case
+    edition_order = {e: i for i, e in enumerate(dict.fromkeys(edition))}
+    case_order = {c: i for i, c in enumerate(dict.fromkeys(case))}
+    groups = sorted(zip(starts, ends), key=lambda g: (edition_order[edition[g[0]]], case_order[case[g[0]]]))
+
+    # px.line also switches to WebGL above 1000 points
+    trace_type, extra = (go.Scattergl, {}) if len(dff) > 1000 else (go.Scatter, dict(orientation="v"))
+
+    traces = []
+    previous = None
+    for start, end in groups:
+        ed, label = edition[start], case[start]
+        line = dict(color=colorway[edition_order[ed] % len(colorway)], dash="solid")
+        line.update(edition_line_styles.get(ed, {}))
+        traces.append(trace_type(
+            x=x[start:end],
+            y=y[start:end],
+            mode="lines",
+            name=ed,
+            legendgroup=ed,
+            showlegend=ed != previous,
+            line=line,
+            marker=dict(symbol="circle"),
+            xaxis="x",
+            yaxis="y",
+            hovertemplate=f"edition={ed}<br>case={label}<br>year=%{{x}}<br>{indicator}=%{{y}}<extra></extra>",
+            **extra,
+        ))
+        previous = ed
+    return traces
+
+
+def line_figure(dff: pd.DataFrame, indicator: str, title: str, template: go.layout.Template) -> go.Figure:
+    yaxis = dict(anchor="x", domain=[0.0, 1.0], title=dict(), tickfont=axis_font, mirror=True,
+                 showline=False, linecolor='black', gridcolor='lightgrey')
+    if indicator[:4] == "PRCE":
+        yaxis.update(tickprefix='$', separatethousands=True)
+
+    layout = dict(
+        template=template,
+        title=dict(text=title, font=axis_font),
+        legend=dict(title=dict(text="edition"), tracegroupgap=0, font=axis_font),
+        xaxis=dict(anchor="y", domain=[0.0, 1.0], title=dict(text="year", font=axis_font, standoff=1),
+                   tickfont=axis_font, automargin=True, mirror=False, ticks='outside', showline=True,
+                   linecolor='black', linewidth=2, gridcolor='lightgrey'),
+        yaxis=yaxis,
+        paper_bgcolor='rgba(0, 0, 0, 0)',
+        plot_bgcolor='rgba(0, 0, 0, 0)',
+        modebar=dict(orientation='h', bgcolor='#ffffff', color='red', activecolor='red'),
+    )
+    return go.Figure(data=line_traces(dff, indicator, template_colorway(template)), layout=layout)
+
+
+def error_figure(errors: pd.DataFrame, metric: str, title: str, metric_title: str,
+                 template: go.layout.Template) -> go.Figure:
+    """`metric` by forecast horizon, one line per case, from rows of ForecastErrors.by_horizon."""
+    colorway = template_colorway(template)
+    traces = []
+    for i, (label, rows) in enumerate(errors.groupby("case_name_labels", observed=True, sort=True)):
+        traces.append(go.Scatter(
+            x=rows["horizon"].to_numpy(),
+            y=rows[metric].to_numpy(),
+            customdata=rows["n"].to_numpy(),
+            mode="lines+markers",
+            name=label,
+            line=dict(color=colorway[i % len(colorway)]),
+            hovertemplate=f"case={label}<br>horizon=%{{x}}<br>{metric}=%{{y:,.2f}}<br>values=%{{customdata}}<extra></extra>",
+        ))
+
+    layout = dict(
+        template=template,
+        title=dict(text=title, font=axis_font),
+        legend=dict(title=dict(text="case"), font=axis_font),
+        xaxis=dict(title=dict(text="years after the edition", font=axis_font), tickfont=axis_font,
+                   ticks='outside', showline=True, linecolor='black', linewidth=2, gridcolor='lightgrey'),
+        yaxis=dict(title=dict(text=metric_title), tickfont=axis_font, separatethousands=True,
+                   gridcolor='lightgrey', zeroline=True, zerolinecolor='black'),
+        paper_bgcolor='rgba(0, 0, 0, 0)',
+        plot_bgcolor='rgba(0, 0, 0, 0)',
+        modebar=dict(orientation='h', bgcolor='#ffffff', color='red', activecolor='red'),
+    )
+    return go.Figure(data=traces, layout=layout)
+
+
+def _y_range(traces: list, start: float, end: float):
+    # the y span of the points in view with the 5% padding plotly's autorange adds
+    lows, highs = [], []
+    for trace in traces:
+        x = decode_array(trace.get("x", []))
+        y = decode_array(trace.get("y", []))
+        y = y[(x >= start) & (x <= end) & ~np.isnan(y)]
+        if len(y):
+            lows.append(y.min())
+            highs.append(y.max())
+    if not lows:
+        return None
+    low, high = min(lows), max(highs)
+    pad = (high - low) * 0.05 or abs(high) * 0.05 or 1
+    return [float(low - pad), float(high + pad)]
+
+
+def with_year_range(figure: dict, years: list) -> dict:
+    """The plain figure zoomed to `years`, with the y-axis fitted to the points in view.
+
+    The line chart is built over all years and the year slider only moves the
+    axes. assets/year_range.js does the same in the browser when the slider
+    moves; this sets the range of the figure as it is first sent.
+    """
+    layout = figure.get("layout", {})
+    start, end = float(years[0]), float(years[1])
+    y_range = _y_range(figure.get("data", []), start, end)
+    yaxis = dict(layout.get("yaxis", {}), range=y_range, autorange=y_range is None)
+    xaxis = dict(layout.get("xaxis", {}), range=[start, end], autorange=False)
+    return dict(figure, layout=dict(layout, xaxis=xaxis, yaxis=yaxis))
+
+
+def small_multiples(panels: list, titles: list, columns: int = 2, spacing: float = 0.08) -> dict:
+    """The plain line figures `panels` side by side in one figure, `columns` to a row.
+
+    Each panel keeps its traces and axes (ranges included, see with_year_range)
+    on an axis pair of its own, titled by an annotation from `titles`. The
+    layout of the first panel is used for the rest; an edition gets one legend
+    entry over all panels and, as each panel is grouped by edition, toggles its
+    lines in all of them.
+    """
+    columns = max(1, min(columns, len(panels)))
+    rows = -(-len(panels) // columns)
+    width = (1 - spacing * (columns - 1)) / columns
+    height = (1 - spacing * (rows - 1)) / rows
+    panel_font = dict(size=14)
+
+    layout = {key: value for key, value in panels[0].get("layout", {}).items() if key not in ("title", "xaxis", "yaxis")}
+    layout["legend"] = dict(layout.get("legend", {}), font=panel_font)
+    data, annotations, shown = [], [], set()
+    for i, (panel, title) in enumerate(zip(panels, titles)):
+        row, column = divmod(i, columns)
+        suffix = str(i + 1) if i else ""
+        left, top = column * (width + spacing), 1 - row * (height + spacing)
+        panel_layout = panel.get("layout", {})
+        layout[f"xaxis{suffix}"] = dict(panel_layout.get("xaxis", {}), domain=[left, min(1, left + width)], anchor=f"y{suffix}",
+                                        title=dict(), tickfont=panel_font)
+        layout[f"yaxis{suffix}"] = dict(panel_layout.get("yaxis", {}), domain=[max(0, top - height), top], anchor=f"x{suffix}",
+                                        tickfont=panel_font)
+        for trace in panel.get("data", []):
+            group = trace.get("legendgroup")
+            data.append(dict(trace, xaxis=f"x{suffix}", yaxis=f"y{suffix}", showlegend=group not in shown))
+            shown.add(group)
+        annotations.append(dict(text=title, font=panel_font, xref="paper", yref="paper", x=left + width / 2, y=top,
+                                xanchor="center", yanchor="bottom", showarrow=False))
+    layout["annotations"] = annotations
+    return {"data": data, "layout": layout}
+
+
+def _trace_id(trace: dict) -> tuple:
+    # line traces are one per edition and case, scatter traces one per case and edition
+    return trace.get("name"), trace.get("legendgroup"), trace.get("hovertemplate")
+
+
+def figure_patch(shown: dict, figure: dict, max_changed: float = 0.5):
+    """A Patch that turns the plain figure `shown` into `figure`, or `figure` itself.
+
+    Traces only in `shown` are deleted, traces only in `figure` are inserted
+    where they belong and traces in both are replaced if they changed (e.g.
+    the first trace of an edition now shows the legend). Changed layout keys
+    are assigned. When the traces in both are not in the same order, or more
+    than `max_changed` of the new traces would be sent anyway, the whole
+    figure is returned instead.
+    """
+    if not shown or not shown.get("data"):
+        return figure
+    old = {_trace_id(t): t for t in shown["data"]}
+    new = {_trace_id(t): t for t in figure["data"]}
+    if len(old) != len(shown["data"]) or len(new) != len(figure["data"]):
+        return figure
+    if [i for i in old if i in new] != [i for i in new if i in old]:
+        return figure
+
+    changed = [i for i, trace in new.items() if old.get(i) != trace]
+    if len(changed) > max_changed * len(new):
+        return figure
+
+    patch = Patch()
+    # deleting from the end keeps the positions of the remaining traces valid
+    for position, trace_id in reversed(list(enumerate(old))):
+        if trace_id not in new:
+            del patch["data"][position]
+    for position, trace_id in enumerate(new):
+        if trace_id not in old:
+            patch["data"].insert(position, new[trace_id])
+        elif old[trace_id] != new[trace_id]:
+            patch["data"][position] = new[trace_id]
+
+    shown_layout, layout = shown.get("layout", {}), figure.get("layout", {})
+    for key in shown_layout.keys() - layout.keys():
+        del patch["layout"][key]
+    for key, value in layout.items():
+        if shown_layout.get(key) != value:
+            patch["layout"][key] = value
+    return patch
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from utils.constants import case_name_labels_dict
+from utils.cube import BenchmarkCube
+from utils.schema import value_dtype, widen
+
+
+ACTUAL = "ACTUAL"
+
+# mean absolute percent error and signed bias in percent of the actual value,
+# root mean squared error in the units of the indicator
+error_metrics = {
+    "mape": "Mean absolute percent error",
+    "bias": "Mean percent error (bias)",
+    "rmse": "Root mean squared error",
+}
+
+# cells of the cube widened to float64 at a time, about 8 MB
+chunk_cells = 1 << 20
+
+
+def _mean(total: np.ndarray, count: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def _summaries(err: np.ndarray, pct: np.ndarray, total) -> dict:
+    # `total` sums over the cells of each group; NaN cells (no projection or no actual) are left out
+    has_err, has_pct = ~np.isnan(err), ~np.isnan(pct)
+    n, n_pct = total(has_err), total(has_pct)
+    return {
+        "n": n.astype(np.int32),
+        "mape": _mean(total(np.where(has_pct, np.abs(pct), 0)), n_pct),
+        "bias": _mean(total(np.where(has_pct, pct, 0)), n_pct),
+        "rmse": np.sqrt(_mean(total(np.where(has_err, err * err, 0)), n)),
+    }
+
+
+def _concatenate(parts: list) -> dict:
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def _indicator_positions(table: pd.DataFrame) -> dict:
+    return table.groupby("indicator", observed=True).indices
+
+
+def _frame(columns: dict, keys: list) -> pd.DataFrame:
+    df = pd.DataFrame(columns)
+    df = df.astype({name: value_dtype for name in df.columns if pd.api.types.is_float_dtype(df[name])})
+    df.insert(df.columns.get_loc("case_name") + 1, "case_name_labels",
+              df["case_name"].cat.rename_categories(lambda code: case_name_labels_dict.get(code, code)))
+    return df.sort_values(keys, ignore_index=True)
+
+
+class ForecastErrors:
+    """Errors of every AEO projection against the MER actuals, computed once at load time.
+
+    The projections are the BenchmarkCube without its ACTUAL case and the
+    actuals an (indicator x year) array taken from that case, so joining
+    them on the year is a broadcast and the by-edition metrics are
+    reductions over the year axis. The horizon of a value is its year minus
+    the year of its AEO edition; the by-horizon metrics sum the joined cells
+    of all editions per horizon with np.bincount. Three tables come out:
+
+    - `by_edition`: n, mape, bias and rmse per indicator, edition and case,
+      over all horizons
+    - `by_horizon`: the same per indicator, case and horizon, over all editions
+    - `detail`: projected and actual value, error and percent error per
+      indicator, edition, case and horizon; it has a row per point, so it is
+      only computed (from the cube again) when it is first asked for
+
+    The actual of a year is the ACTUAL value of the latest edition that has it.
+    Percent errors are undefined where the actual is 0; such cells only count
+    towards rmse. Data without ACTUAL values or without projections gives
+    empty tables. `table` returns the rows of one indicator and some cases
+    without scanning the whole table.
+    """
+
+    def __init__(self, cube: BenchmarkCube):
+        self.columns = cube.indicators
+        self._cube = cube
+        # the projected cases in the order of their codes, which is the order of the tables
+        self._cases = sorted(c for c in cube.cases if c != ACTUAL)
+
+        detail, by_edition = [], []
+        for start, projected, actual, err, pct in self._blocks():
+            summaries = _summaries(err, pct, lambda values: values.sum(axis=3))
+            cells = np.nonzero(summaries["n"])
+            by_edition.append({"indicator": start + cells[0], "edition": cells[1], "case_name": cells[2],
+                               **{name: values[cells] for name, values in summaries.items()}})
+            detail.append(self._detail_cells(start, projected, actual, err, pct))
+        detail = _concatenate(detail)
+
+        # editions line up on the horizon, so each (indicator, case, horizon) sums the cells of all editions;
+        # without projections or actuals there are no cells and the tables stay empty
+        first_horizon = detail["horizon"].min() if len(detail["horizon"]) else 0
+        horizon = detail["horizon"] - first_horizon
+        n_horizons, n_cases = (horizon.max() + 1 if len(horizon) else 1), len(self._cases)
+        groups, group_idx = np.unique((detail["indicator"] * n_cases + detail["case_name"]) * n_horizons + horizon,
+                                      return_inverse=True)
+        summaries = _summaries(detail["error"], detail["pct_error"],
+                               lambda values: np.bincount(group_idx, values, minlength=len(groups)))
+        by_horizon = {"indicator": groups // (n_cases * n_horizons), "case_name": groups // n_horizons % n_cases,
+                      "horizon": groups % n_horizons + first_horizon, **summaries}
+
+        # the per-point cells are dropped here, only the two summaries are kept
+        self.by_edition = _frame(self._labeled(_concatenate(by_edition)), ["indicator", "edition", "case_name"])
+        self.by_horizon = _frame(self._labeled(by_horizon), ["indicator", "case_name", "horizon"])
+        self._positions = {name: _indicator_positions(getattr(self, name)) for name in ("by_edition", "by_horizon")}
+
+    def _blocks(self):
+        """(first indicator, projected, actual, error, percent error) for a few indicators at a time.
+
+        The blocks are widened to float64 and stay near chunk_cells each. There
+        is at least one (possibly empty) block, so the tables have their
+        columns without data.
+        """
+        cube = self._cube
+        case_positions = [cube.case_index[c] for c in self._cases]
+        shape = (len(cube.editions), len(self._cases), len(cube.years))
+
+        if ACTUAL in cube.case_index:
+            # the latest edition with a value, per indicator and year
+            published = cube.select(case_name=ACTUAL)
+            has_value = ~np.isnan(published)
+            latest = len(cube.editions) - 1 - np.argmax(has_value[:, ::-1, :], axis=1)
+            actuals = np.take_along_axis(published, latest[:, None, :], axis=1)[:, 0, :]
+        else:
+            actuals = np.full((len(self.columns), len(cube.years)), np.nan, dtype=cube.values.dtype)
+
+        step = max(1, chunk_cells // max(1, int(np.prod(shape))))
+        for start in range(0, max(1, len(self.columns)), step):
+            stop = start + step
+            projected = widen(cube.values[start:stop][:, :, case_positions, :])
+            actual = widen(actuals[start:stop])[:, None, None, :]
+
+            # every projection against the actual of its year, over all editions and cases at once
+            err = projected - actual
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pct = 100 * err / np.where(actual != 0, actual, np.nan)
+            yield start, projected, actual, err, pct
+
+    def _detail_cells(self, start, projected, actual, err, pct) -> dict:
+        years, edition_years = self._cube.years, self._cube.edition_years
+        i, e, c, y = np.nonzero(~np.isnan(err))
+        return {"indicator": start + i, "edition": e, "case_name": c,
+                "horizon": years[y] - edition_years[e], "year": years[y],
+                "projected": projected[i, e, c, y], "actual": actual[i, 0, 0, y],
+                "error": err[i, e, c, y], "pct_error": pct[i, e, c, y]}
+
+    def _labeled(self, table: dict) -> dict:
+        # the positions become categoricals of the labels, without a string per row
+        labels = {"indicator": self.columns, "edition": self._cube.editions, "case_name": self._cases}
+        return dict(table, **{name: pd.Categorical.from_codes(table[name], categories)
+                              for name, categories in labels.items() if name in table})
+
+    @cached_property
+    def detail(self) -> pd.DataFrame:
+        detail = _concatenate([self._detail_cells(*block) for block in self._blocks()])
+        return _frame(self._labeled(detail), ["indicator", "edition", "case_name", "horizon"])
+
+    def table(self, name: str, indicator: str, case_names: list = None) -> pd.DataFrame:
+        """The rows of `indicator` (and `case_names`, if given) in the table `name`."""
+        table = getattr(self, name)
+        if name not in self._positions:
+            self._positions[name] = _indicator_positions(table)
+        rows = table.take(self._positions[name].get(indicator, []))
+        if case_names is not None:
+            rows = rows[rows["case_name"].isin(case_names)]
+        return rows
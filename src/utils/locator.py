@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+from collections import deque
+from pathlib import Path
+
+
+# a file or folder given here wins over the search below, e.g.
+#   DASH_BENCHMARK_DATA=/mnt/eia/benchmark python app.py
+DATA_ROOT_ENV = "DASH_BENCHMARK_DATA"
+
+# the data folder shipped with the repo (src/data)
+default_data_root = Path(__file__).resolve().parents[1] / "data"
+
+# folders that never hold the benchmark data and can be large
+pruned_dirs = {".git", "__pycache__", "assets", ".venv", "venv", "node_modules",
+               ".pytest_cache", ".mypy_cache", ".ruff_cache", ".tox", ".nox"}
+
+max_search_depth = 3
+
+# kept out of the data folder, so runs with other roots (e.g. the benchmarks) leave the repo alone
+manifest_path = Path(tempfile.gettempdir()) / "dash-benchmark-data-manifest.json"
+
+
+def search_roots() -> list:
+    roots = []
+    if os.environ.get(DATA_ROOT_ENV):
+        roots.append(Path(os.environ[DATA_ROOT_ENV]))
+    roots += [default_data_root, Path.cwd()]
+    return roots
+
+
+def search_data_file(name: str, roots: list, max_depth: int = max_search_depth) -> Path:
+    """Breadth-first search for `name` below each root, at most `max_depth` folders deep.
+
+    Roots are tried in order and entries are visited sorted by name, so the
+    shallowest match in the first root that has one is returned no matter how
+    the filesystem happens to list its entries.
+    """
+    for root in roots:
+        root = Path(root)
+        if root.is_file():
+            if root.name == name:
+                return root.resolve()
+            continue
+
+        queue = deque([(root, 0)])
+        while queue:
+            folder, depth = queue.popleft()
+            try:
+                entries = sorted(os.scandir(folder), key=lambda entry: entry.name)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name == name and entry.is_file():
+                    return Path(entry.path).resolve()
+            if depth < max_depth:
+                queue.extend((Path(entry.path), depth + 1) for entry in entries
+                             if entry.is_dir(follow_symlinks=False) and entry.name not in pruned_dirs
+                             and not entry.name.endswith(".cache"))
+    return None
+
+
+def _read_manifest(path: Path) -> dict:
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(path: Path, manifest: dict):
+    try:
+        tmp_path = Path(path).with_suffix(f".tmp{os.getpid()}")
+        tmp_path.write_text(json.dumps(manifest, indent=1))
+        os.replace(tmp_path, path)
+    except OSError:
+        # the manifest only saves a search on the next start, so failing to
+        # write it is not an error
+        pass
+
+
+def _file_stamp(path: Path) -> dict:
+    stat = Path(path).stat()
+    return {"path": str(path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _entry_is_current(entry: dict) -> bool:
+    try:
+        return _file_stamp(entry["path"]) == entry
+    except (OSError, KeyError, TypeError):
+        return False
+
+
+def find_data_file(name: str, roots: list = None, max_depth: int = max_search_depth,
+                   manifest: Path = manifest_path) -> Path:
+    """Resolve the data file `name`, remembering the answer in a small manifest.
+
+    The manifest keeps the resolved path per file name and search roots, so
+    runs with different roots do not replace each other's entry, along with
+    the modification time and size of the file. An entry is reused as long as
+    its file is still there unchanged, so a normal start does not touch the
+    directory tree at all; a file that was changed or replaced is searched
+    for again.
+    """
+    roots = [str(Path(r).resolve()) for r in (roots or search_roots())]
+    key = json.dumps([name, roots])
+
+    entries = _read_manifest(manifest)
+    entry = entries.get(key)
+    if entry and _entry_is_current(entry):
+        return Path(entry["path"])
+
+    path = search_data_file(name, roots, max_depth=max_depth)
+    if path is None:
+        raise FileNotFoundError(
+            f"could not find {name} within {max_depth} folders of {', '.join(roots)}; "
+            f"place it in {default_data_root} or set {DATA_ROOT_ENV}"
+        )
+
+    entries[key] = _file_stamp(path)
+    _write_manifest(manifest, entries)
+    return path
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import Response, g, has_request_context
+
+
+# opt-in: DASH_BENCHMARK_SERVER_TIMING=1 adds a Server-Timing header with the phases of
+# each callback to its response, shown in the network panel of the browser's devtools
+SERVER_TIMING_ENV = "DASH_BENCHMARK_SERVER_TIMING"
+
+# upper bounds of the histogram buckets, in seconds and in bytes
+latency_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+size_buckets = (1_000, 3_000, 10_000, 30_000, 100_000, 300_000, 1_000_000, 3_000_000)
+
+# the phases of the callback running in this context, None outside of an instrumented callback
+_phases = ContextVar("callback_phases", default=None)
+
+
+def server_timing_enabled() -> bool:
+    return os.environ.get(SERVER_TIMING_ENV, "").lower() not in ("", "0", "false", "no")
+
+
+class Histogram:
+    """Bucketed observations in the Prometheus histogram layout."""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: dict) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {self.sum:.6g}")
+        lines.append(f"{name}_count{_labels(labels)} {self.count}")
+        return lines
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+class CallbackMetrics:
+    """Timings, response sizes and errors of the Dash callbacks of one worker.
+
+    `instrument(name)` wraps a callback and `phase(name)` times a step inside
+    it (filter, derive, build, style, ...). After the callback returns, Dash
+    serializes its output; that time and the size of the response are taken
+    in an after_request hook (see register_metrics_route). `add_collector`
+    adds gauges and counters read at scrape time, such as the figure cache
+    statistics. Each gunicorn worker keeps its own numbers, so a scrape shows
+    the worker that answered it, identified by the `worker` label.
+    """
+
+    namespace = "dash_benchmark"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callback_seconds = {}
+        self._phase_seconds = {}
+        self._response_bytes = {}
+        self._errors = {}
+        self._collectors = []
+
+    def _observe(self, histograms: dict, key, buckets: tuple, value: float):
+        with self._lock:
+            if key not in histograms:
+                histograms[key] = Histogram(buckets)
+            histograms[key].observe(value)
+
+    @contextmanager
+    def phase(self, name: str):
+        phases = _phases.get()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if phases is not None:
+                phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+    def instrument(self, name: str):
+        """Decorator recording the total and per-phase time of the callback `name`."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                token = _phases.set({})
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    with self._lock:
+                        self._errors[name] = self._errors.get(name, 0) + 1
+                    raise
+                finally:
+                    end = time.perf_counter()
+                    phases = _phases.get()
+                    _phases.reset(token)
+                    self._observe(self._callback_seconds, name, latency_buckets, end - start)
+                    for phase, seconds in phases.items():
+                        self._observe(self._phase_seconds, (name, phase), latency_buckets, seconds)
+                    if has_request_context():
+                        # picked up by the after_request hook, which adds the serialize phase
+                        g.callback_timing = (name, phases, end - start, end)
+            return wrapper
+
+        return decorator
+
+    def observe_response(self, name: str, serialize_seconds: float, size: int):
+        self._observe(self._phase_seconds, (name, "serialize"), latency_buckets, serialize_seconds)
+        if size is not None:
+            self._observe(self._response_bytes, name, size_buckets, size)
+
+    def add_collector(self, collect):
+        """`collect()` returns [(name, type, help, [(labels, value), ...]), ...] at scrape time."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        worker = {"worker": str(os.getpid())}
+        ns = self.namespace
+        lines = []
+
+        def histograms(name, help_text, entries, label_names):
+            lines.extend([f"# HELP {ns}_{name} {help_text}", f"# TYPE {ns}_{name} histogram"])
+            for key, histogram in sorted(entries.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                lines.extend(histogram.samples(f"{ns}_{name}", {**worker, **dict(zip(label_names, key))}))
+
+        with self._lock:
+            histograms("callback_seconds", "Time spent in each Dash callback.",
+                       self._callback_seconds, ["callback"])
+            histograms("callback_phase_seconds", "Time spent in each phase of a Dash callback, serialize included.",
+                       self._phase_seconds, ["callback", "phase"])
+            histograms("callback_response_bytes", "Size of the callback responses before compression.",
+                       self._response_bytes, ["callback"])
+            errors = dict(self._errors)
+
+        lines.extend([f"# HELP {ns}_callback_errors_total Callbacks that raised an exception.",
+                      f"# TYPE {ns}_callback_errors_total counter"])
+        lines.extend(f"{ns}_callback_errors_total{_labels({**worker, 'callback': name})} {count}"
+                     for name, count in sorted(errors.items()))
+
+        for collect in self._collectors:
+            for name, kind, help_text, samples in collect():
+                lines.extend([f"# HELP {ns}_{name} {help_text}", f"# TYPE {ns}_{name} {kind}"])
+                lines.extend(f"{ns}_{name}{_labels({**worker, **labels})} {value}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+def register_metrics_route(app, metrics: CallbackMetrics, server_timing: bool = None):
+    """Serve `metrics` at <prefix>metrics and time the serialization of callback responses.
+
+    With `server_timing` (default: DASH_BENCHMARK_SERVER_TIMING) each callback
+    response also carries a Server-Timing header with its phases in ms.
+    """
+    if server_timing is None:
+        server_timing = server_timing_enabled()
+
+    @app.server.route(app.config.routes_pathname_prefix + "metrics")
+    def prometheus_metrics():
+        return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8",
+                        headers={"Cache-Control": "no-store"})
+
+    @app.server.after_request
+    def callback_timing(response):
+        timing = g.pop("callback_timing", None)
+        if timing is None:
+            return response
+        name, phases, total, end = timing
+        # Dash serializes the callback output between the callback's return and this hook
+        serialize = time.perf_counter() - end
+        size = None if response.is_streamed else response.calculate_content_length()
+        metrics.observe_response(name, serialize, size)
+        if server_timing:
+            entries = {**phases, "serialize": serialize, "callback": total}
+            response.headers["Server-Timing"] = ", ".join(f"{phase};dur={seconds * 1e3:.1f}"
+                                                          for phase, seconds in entries.items())
+        return response
+
+    return prometheus_metrics
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+
+# processes per worker that build figures, so a slow build does not hold the GIL of the
+# threads serving other requests; 0 (the default) builds in the request thread
+BUILD_PROCESSES_ENV = "DASH_BENCHMARK_BUILD_PROCESSES"
+# seconds a callback waits for its figure before it gives up
+BUILD_TIMEOUT_ENV = "DASH_BENCHMARK_BUILD_TIMEOUT"
+
+default_build_timeout = 30.0
+
+# how often a waiting callback checks whether a newer request of its page replaced it
+poll_interval = 0.05
+
+
+class Superseded(Exception):
+    """A newer request of the same page and callback came in while this one waited."""
+
+
+class BuildPool:
+    """Runs figure builds in forked processes that share the loaded data of the worker.
+
+    `start` forks the processes, and should be called while the worker has
+    no other threads (before the data manager and the cache warmer start), so
+    every process gets the frame, indexes and templates copy-on-write, like
+    the gunicorn workers get them from the master. The processes keep the
+    data they were forked with, so a function run here is sent the version
+    of the data it is meant for and loads a newer csv itself.
+
+    `run(session, keep, func, *args)` waits for `func(*args)` in a process:
+
+    - a newer `run` for the same `session` (a page and a callback) cancels
+      this build if it has not started yet and makes this call raise
+      Superseded, so the thread is free again and the page gets the newer
+      figure only
+    - after `timeout` seconds the call raises TimeoutError
+    - `keep(result)` is called once the build is done, even when nobody
+      waits for it anymore, so a late figure still lands in the cache
+
+    A pool whose process died (e.g. killed for memory) is not used again;
+    `run` raises BrokenProcessPool and callers build in their own thread.
+    """
+
+    def __init__(self, processes: int = None, timeout: float = None):
+        if processes is None:
+            processes = int(os.environ.get(BUILD_PROCESSES_ENV, 0))
+        if timeout is None:
+            timeout = float(os.environ.get(BUILD_TIMEOUT_ENV, default_build_timeout))
+        self.processes = processes
+        self.timeout = timeout
+        self.superseded = 0
+        self.timed_out = 0
+        self._executor = None
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        if self.processes <= 0 or self._executor is not None:
+            return
+        if "fork" not in multiprocessing.get_all_start_methods():
+            warnings.warn("figure builds stay in the request threads, this platform cannot fork")
+            return
+        self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("fork"))
+        # with fork, all processes are started on the first submit, from this thread
+        self._executor.submit(os.getpid).result()
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def run(self, session, keep, func, *args):
+        executor = self._executor
+        if executor is None:
+            raise BrokenProcessPool("no build processes")
+        try:
+            future = executor.submit(func, *args)
+        except (BrokenProcessPool, RuntimeError) as error:
+            self._broken(error)
+            raise BrokenProcessPool(str(error)) from error
+        future.add_done_callback(lambda done: done.cancelled() or done.exception() or keep(done.result()))
+
+        if session is not None:
+            with self._lock:
+                previous, self._latest[session] = self._latest.get(session), future
+            if previous is not None:
+                # only cancelled while queued; a started build finishes into the cache
+                previous.cancel()
+
+        try:
+            return self._wait(session, future)
+        except Superseded:
+            with self._lock:
+                self.superseded += 1
+            raise
+        except BrokenProcessPool as error:
+            self._broken(error)
+            raise
+        finally:
+            if session is not None:
+                with self._lock:
+                    if self._latest.get(session) is future:
+                        del self._latest[session]
+
+    def _wait(self, session, future):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                return future.result(timeout=poll_interval)
+            except FutureTimeout:
+                pass
+            except CancelledError:
+                raise Superseded() from None
+            if session is not None and self._latest.get(session) is not future:
+                raise Superseded()
+            if time.monotonic() > deadline:
+                with self._lock:
+                    self.timed_out += 1
+                raise TimeoutError(f"no figure after {self.timeout:g} s")
+
+    def _broken(self, error):
+        warnings.warn(f"figure builds are back in the request threads, a build process failed: {error!r}")
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"processes": self.processes if self._executor else 0, "superseded": self.superseded,
+                    "timed_out": self.timed_out}
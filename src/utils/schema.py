@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+
+from utils.constants import indicators
+from utils.derived import POPULATION, REAL_GDP
+
+
+# the csv columns the app reads; anything else in the csv is dropped when it is parsed
+key_columns = ["edition", "case_name", "year"]
+value_columns = indicators + [POPULATION, REAL_GDP]
+
+# dtypes of the cleaned frame, every other (float) column is stored as float32
+category_columns = ["edition", "case_name", "case_name_labels"]
+year_dtype = np.int16
+value_dtype = np.float32
+
+# float32 keeps about 7 significant digits, which covers the published precision
+value_digits = 7
+
+
+def csv_columns(name) -> bool:
+    # usecols callable, so a csv that lacks one of the indicators still loads
+    return name in key_columns or name in value_columns
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast the cleaned frame to its lean dtypes.
+
+    Editions, cases and labels become categoricals (editions ordered by year),
+    the year int16 and every float column float32. The ratios are computed
+    before this, in float64.
+    """
+    dtypes = {c: value_dtype for c in df.columns if pd.api.types.is_float_dtype(df[c])}
+    dtypes["year"] = year_dtype
+    for name in category_columns:
+        dtypes[name] = pd.CategoricalDtype(sorted(df[name].dropna().unique()), ordered=name == "edition")
+    return df.astype(dtypes)
+
+
+def widen(values) -> np.ndarray:
+    """float32 values as float64, rounded to the 7 significant digits float32 holds.
+
+    A value read as 61.057 is stored as 61.05699920654297 in float32; this
+    gives back 61.057, so figures, hover labels and grid cells show the
+    numbers of the csv. Other dtypes are returned as they are.
+    """
+    if getattr(values, "dtype", None) != value_dtype:
+        return values
+    wide = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = value_digits - 1 - np.floor(np.log10(np.abs(wide)))
+    shift = np.nan_to_num(shift, nan=0, posinf=0, neginf=0)
+    # powers of ten up to 1e22 are exact, so dividing by one rounds correctly
+    scale = 10.0 ** np.abs(shift)
+    return np.where(shift >= 0, np.round(wide * scale) / scale, np.round(wide / scale) * scale)
+
+
+def widen_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    wide = {c: widen(frame[c].to_numpy()) for c in frame.columns if frame[c].dtype == value_dtype}
+    return frame.assign(**wide) if wide else frame
+
+
+def _size(nbytes: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if nbytes < 1024:
+            return f"{nbytes:.0f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} GB"
+
+
+def memory_report(df: pd.DataFrame) -> str:
+    """One line with the size of the frame, in total and by dtype."""
+    usage = df.memory_usage(index=False, deep=True)
+    by_dtype = usage.groupby(df.dtypes.astype(str)).sum().sort_values(ascending=False)
+    parts = ", ".join(f"{dtype} {_size(nbytes)}" for dtype, nbytes in by_dtype.items())
+    return f"benchmark data: {len(df):,} rows x {len(df.columns)} columns, {_size(usage.sum())} ({parts})"
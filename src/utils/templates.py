@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from importlib.resources import files
+
+import dash_bootstrap_components as dbc
+import plotly.graph_objs as go
+import plotly.io as pio
+from dash import html
+from flask import Response, abort, request
+from dash_bootstrap_templates import ThemeChangerAIO, dbc_templates
+
+
+# the theme names and stylesheet urls offered by ThemeChangerAIO, in the same order
+dbc_themes_url = {item: getattr(dbc.themes, item) for item in dir(dbc.themes) if not item.startswith(("_", "GRID"))}
+# the theme the app opens with
+default_theme_url = dbc_themes_url["BOOTSTRAP"]
+dbc_dark_themes = ["cyborg", "darkly", "slate", "solar", "superhero", "vapor"]
+
+
+def template_json_path(name: str):
+    return files("dash_bootstrap_templates") / "templates" / f"{name}.json"
+
+
+def is_bootstrap_template(name: str) -> bool:
+    return name.removesuffix("_dark") in dbc_templates
+
+
+class TemplateRegistry:
+    """Bootstrap figure templates, read from dash_bootstrap_templates on first use.
+
+    Each template is kept as compact json, as the plain dict Dash encodes when
+    it is patched into a figure, and as an unvalidated go.layout.Template for
+    the figure builders. Only the `maxsize` most recently used templates are
+    kept. Names that are not Bootstrap templates (e.g. "simple_white") are
+    handed to plotly.io.templates, which loads its own on first use.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self.loads = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> dict:
+        with self._lock:
+            if name in self._entries:
+                self._entries.move_to_end(name)
+                return self._entries[name]
+
+        if is_bootstrap_template(name):
+            # the packaged files were validated when they were generated, so they
+            # are read without plotly's validation, which is most of the load time
+            plain = json.loads(template_json_path(name).read_text())
+        else:
+            plain = pio.templates[name].to_plotly_json()
+        blob = json.dumps(plain, separators=(",", ":"))
+        entry = {
+            "blob": blob,
+            "etag": hashlib.sha1(blob.encode()).hexdigest(),
+            "plain": plain,
+            "template": go.layout.Template(plain, _validate=False),
+        }
+
+        with self._lock:
+            self.loads += 1
+            self._entries[name] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def template(self, name: str) -> go.layout.Template:
+        return self._entry(name)["template"]
+
+    def plain(self, name: str) -> dict:
+        return self._entry(name)["plain"]
+
+    def blob(self, name: str) -> str:
+        return self._entry(name)["blob"]
+
+    def etag(self, name: str) -> str:
+        return self._entry(name)["etag"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": list(self._entries), "maxsize": self.maxsize, "loads": self.loads}
+
+
+def theme_changer(aio_id: str) -> html.Div:
+    """The ThemeChangerAIO layout, without loading all 52 templates into plotly.io.
+
+    ThemeChangerAIO() calls load_figure_template("all") whenever it is created.
+    Its callbacks are registered when the class is defined and match on these
+    ids, so the button, offcanvas and radio items work as before.
+    """
+    options = [
+        {
+            "label": name,
+            "label_id": "theme-switch-label-dark" if name.lower() in dbc_dark_themes else "theme-switch-label",
+            "value": url,
+        }
+        for name, url in dbc_themes_url.items()
+    ]
+    return html.Div(
+        [
+            dbc.Button("Change Theme", id=ThemeChangerAIO.ids.button(aio_id), color="secondary", outline=True, size="sm"),
+            dbc.Offcanvas(
+                [dbc.RadioItems(id=ThemeChangerAIO.ids.radio(aio_id), options=options, value=default_theme_url)],
+                id=ThemeChangerAIO.ids.offcanvas(aio_id),
+                title="Select a Theme",
+                is_open=False,
+                style={"width": 235},
+            ),
+            html.Div(default_theme_url, id=ThemeChangerAIO.ids.dummy_div(aio_id), hidden=True),
+        ]
+    )
+
+
+def register_template_route(app, registry: TemplateRegistry) -> dict:
+    """Serve each Bootstrap figure template as json at <prefix>templates/<name>.json.
+
+    Responses carry an ETag, so the browser revalidates its copy and receives
+    a bodyless 304 unless the template changed. Returns the url base of each
+    theme's templates, keyed by the theme's stylesheet url as used by the
+    ThemeChangerAIO radio items, plus "default" for stylesheets without a
+    template; "_dark.json" or ".json" completes the url.
+    """
+
+    @app.server.route(app.config.routes_pathname_prefix + "templates/<name>.json")
+    def figure_template(name):
+        if not is_bootstrap_template(name):
+            abort(404)
+        response = Response(registry.blob(name), mimetype="application/json",
+                            headers={"Cache-Control": "no-cache"})
+        response.set_etag(registry.etag(name))
+        return response.make_conditional(request)
+
+    urls = {url: app.get_relative_path(f"/templates/{name.lower()}") for name, url in dbc_themes_url.items()}
+    # template_from_url falls back to the bootstrap template as well
+    urls["default"] = app.get_relative_path("/templates/bootstrap")
+    return urls
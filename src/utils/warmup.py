@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+import threading
+import time
+import warnings
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# threads that build figures into the cache in the background, 0 turns warming off
+WARMUP_THREADS_ENV = "DASH_BENCHMARK_WARMUP_THREADS"
+# how often each view was asked for, shared by the workers and kept across restarts
+POPULAR_VIEWS_ENV = "DASH_BENCHMARK_POPULAR_VIEWS"
+
+default_popular_views_path = Path(tempfile.gettempdir()) / "dash-benchmark-popular-views.json"
+
+
+def _view(entry) -> tuple:
+    # a figure cache key read back from json, with its lists as tuples again
+    return tuple(tuple(item) if isinstance(item, list) else item for item in entry)
+
+
+class CacheWarmer:
+    """Builds figures into the figure cache in the background, before anyone asks for them.
+
+    `warm(data, view)` builds one view (a FigureCache key) of `data` unless it
+    is cached already. `schedule` queues views on a small thread pool, right
+    after start-up and after each reload of the csv; views still queued for
+    an older build of the data are skipped.
+
+    `record(view)` counts the views the callbacks are asked for. The most
+    popular ones are warmed right after the default view, ahead of the other
+    fixed views, so the warm set follows what analysts look at. The counts are merged into a json file every
+    `save_interval` seconds, so all workers add to the same counts and a
+    restarted app warms the views that were popular before it.
+    """
+
+    def __init__(self, warm, threads: int = None, popular: int = 32, path: Path = None,
+                 save_interval: float = 60.0, max_views: int = 1000):
+        if threads is None:
+            threads = int(os.environ.get(WARMUP_THREADS_ENV, 1))
+        self.warm = warm
+        self.threads = threads
+        self.popular = popular
+        self.path = Path(path or os.environ.get(POPULAR_VIEWS_ENV, default_popular_views_path))
+        self.save_interval = save_interval
+        self.max_views = max_views
+        self.counts = Counter(self._read())
+        self.warmed = 0
+        self.failed = 0
+        self.skipped = 0
+
+        self._pending = Counter()
+        self._saved_at = time.monotonic()
+        self._generation = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        try:
+            return {_view(view): count for view, count in json.loads(self.path.read_text())}
+        except (OSError, ValueError, TypeError):
+            return {}
+
+    def record(self, view: tuple):
+        with self._lock:
+            self.counts[view] += 1
+            self._pending[view] += 1
+            due = time.monotonic() - self._saved_at >= self.save_interval
+            if due:
+                self._saved_at = time.monotonic()
+        if due:
+            # written off the request thread when there is a pool to write it on
+            if self._executor is not None:
+                self._executor.submit(self.save)
+            else:
+                self.save()
+
+    def most_popular(self, n: int = None) -> list:
+        with self._lock:
+            return [view for view, _ in self.counts.most_common(self.popular if n is None else n)]
+
+    def save(self):
+        """Add the counts recorded since the last save to the file and adopt the merged counts."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return
+        counts = Counter(self._read())
+        counts.update(pending)
+        counts = counts.most_common(self.max_views)
+        tmp_path = self.path.with_suffix(f".tmp{os.getpid()}.{threading.get_ident()}")
+        try:
+            tmp_path.write_text(json.dumps(counts))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # another worker keeps the counts; ours are merged into the next save
+            with self._lock:
+                self._pending.update(pending)
+            return
+        with self._lock:
+            # what other workers recorded since, plus what this one recorded while saving
+            self.counts = Counter(dict(counts)) + self._pending
+
+    def schedule(self, data, views: list):
+        """Warm the first of `views`, the most popular views and the rest of `views` of `data`, in that order."""
+        if self.threads <= 0:
+            return
+        views = list(dict.fromkeys(views[:1] + self.most_popular() + views[1:]))
+        with self._lock:
+            self._generation = data.generation
+            if self._executor is None:
+                # created on first use, since pool threads do not survive a fork
+                self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="cache-warmer")
+        for view in views:
+            self._executor.submit(self._warm, data, view)
+
+    def _warm(self, data, view: tuple):
+        if data.generation != self._generation:
+            # a newer csv was loaded while this view waited
+            outcome = "skipped"
+        else:
+            try:
+                self.warm(data, view)
+                outcome = "warmed"
+            except Exception as error:
+                outcome = "failed"
+                warnings.warn(f"could not warm {view!r}: {error!r}")
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"warmed": self.warmed, "failed": self.failed, "skipped": self.skipped,
+                    "views": len(self.counts), "threads": self.threads}
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+# Production entry point. From the src folder run:
+#   gunicorn wsgi:server
+# which also picks up the settings in gunicorn.conf.py (workers, threads, preloading).
+
+import gc
+
+from app import app
+
+server = app.server
+
+# with preload_app the data, indexes and plotly templates are loaded once in the
+# gunicorn master; freezing them keeps the garbage collector from touching (and
+# so copying) those pages in every forked worker
+gc.freeze()
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+import sys
+from pathlib import Path
+
+# the app imports its modules as utils.*, from the src folder
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cube import BenchmarkCube, case_axis
+from utils.series_index import SeriesIndex
+
+
+@pytest.fixture
+def frame():
+    # 2025 has no HIGHMACRO row for 2031 and a row without a coal value for 2030
+    return pd.DataFrame({
+        "edition": pd.Categorical(["2023", "2023", "2023", "2025", "2025", "2025", "2025"], ordered=True),
+        "case_name": pd.Categorical(["REFERENCE", "REFERENCE", "HIGHMACRO", "REFERENCE", "REFERENCE",
+                                     "HIGHMACRO", "ACTUAL"]),
+        "case_name_labels": pd.Categorical(["Reference case", "Reference case", "High Economic Growth",
+                                            "Reference case", "Reference case", "High Economic Growth", "Actual"]),
+        "year": np.array([2030, 2031, 2030, 2030, 2031, 2030, 2024], dtype=np.int16),
+        "coal": np.array([1, 2, 3, 4, 5, np.nan, 7], dtype=np.float32),
+        "gas": np.array([10, 20, 30, 40, 50, 60, 70], dtype=np.float32),
+    })
+
+
+@pytest.fixture
+def cube(frame):
+    return BenchmarkCube(frame, ["gas", "coal", "oil"])
+
+
+def test_axes(cube):
+    # indicators the frame lacks get no slot, cases follow case_name_labels_dict
+    assert cube.indicators == ["gas", "coal"]
+    assert cube.editions == ["2023", "2025"]
+    assert cube.cases == ["ACTUAL", "HIGHMACRO", "REFERENCE"]
+    assert list(cube.years) == list(range(2024, 2032))
+    assert cube.values.shape == (2, 2, 3, 8)
+    assert cube.values.dtype == np.float32
+    assert case_axis(["ZZZ", "REFERENCE", "AAA"]) == ["REFERENCE", "AAA", "ZZZ"]
+
+
+def test_select_single_cells(cube):
+    assert cube.select("coal", "2023", "HIGHMACRO", 2030) == 3
+    assert cube.select("gas", "2025", "ACTUAL", 2024) == 70
+    # no row, and a row without a value, are both NaN
+    assert np.isnan(cube.select("coal", "2025", "HIGHMACRO", 2031))
+    assert np.isnan(cube.select("coal", "2025", "HIGHMACRO", 2030))
+    assert np.isnan(cube.select("gas", "2023", "ACTUAL", 2030))
+
+
+def test_cross_section_is_a_view(cube):
+    # every edition and case for one year
+    section = cube.select("gas", year=2030)
+    assert section.shape == (2, 3)
+    assert np.shares_memory(section, cube.values)
+    np.testing.assert_array_equal(section, [[np.nan, 30, 10], [np.nan, 60, 40]])
+
+    span = cube.select("coal", case_name="REFERENCE", year=slice(2030, 2031))
+    assert np.shares_memory(span, cube.values)
+    np.testing.assert_array_equal(span, [[1, 2], [4, 5]])
+
+
+def test_label_lists_are_copies(cube):
+    cases = cube.select("gas", "2025", ["HIGHMACRO", "REFERENCE"], 2030)
+    assert not np.shares_memory(cases, cube.values)
+    np.testing.assert_array_equal(cases, [60, 40])
+
+
+def test_unknown_label(cube):
+    with pytest.raises(KeyError):
+        cube.select("oil")
+    with pytest.raises(KeyError):
+        cube.select("gas", edition="2024")
+
+
+def test_present(cube):
+    # the row without a coal value is there, the missing 2031 row is not
+    assert cube.present[cube.edition_index["2025"], cube.case_index["HIGHMACRO"]].tolist() == [
+        False] * 6 + [True, False]
+    assert cube.present.sum() == 7
+
+
+@pytest.mark.parametrize("case_names, years", [
+    (["REFERENCE", "HIGHMACRO", "ACTUAL"], None),
+    (["HIGHMACRO", "REFERENCE"], [2030, 2030]),
+    (["REFERENCE", "NOPE"], [2000, 2100]),
+    ([], None),
+])
+def test_frame_has_the_rows_of_the_series_index(frame, cube, case_names, years):
+    keys = ["edition", "case_name", "year"]
+    expected = SeriesIndex(frame).frame(["coal", "gas"], case_names, years).sort_values(keys, ignore_index=True)
+    rows = cube.frame(["coal", "gas"], case_names, years).sort_values(keys, ignore_index=True)
+    pd.testing.assert_frame_equal(rows, expected)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import os
+import warnings
+
+import pandas as pd
+import pytest
+
+from utils import data_store
+from utils.data_manager import DataManager
+from utils.schema import value_columns
+
+
+@pytest.fixture
+def csv(tmp_path):
+    # two editions of the reference case in the layout of the benchmark csv
+    rows = [{"edition": edition, "case_name": f"REF{edition}", "year": year}
+            for edition in (2023, 2025) for year in range(2023, 2027)]
+    df = pd.DataFrame(rows)
+    for i, column in enumerate(value_columns):
+        df[column] = [float(i + k) for k in range(len(df))]
+    path = tmp_path / "eia-aeo-mer-benchmark-test.csv"
+    df.to_csv(path)
+    return path
+
+
+def test_load_writes_and_reuses_the_cache(csv):
+    df = data_store.load_benchmark_data(csv)
+    cache_dir = data_store.cache_dir_for(csv)
+    assert data_store.cache_is_fresh(csv, cache_dir)
+    assert data_store.load_benchmark_data(csv).equals(df)
+
+
+def test_cache_swapped_out_while_reading(csv, monkeypatch):
+    def swapped(cache_dir, mmap_mode="r"):
+        raise FileNotFoundError(cache_dir)
+
+    monkeypatch.setattr(data_store, "read_cache", swapped)
+    df = data_store.load_benchmark_data(csv)
+    assert len(df) and "edition" in df
+
+
+class FlakyBuild:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, path, generation):
+        self.calls += 1
+        if generation > 1:
+            raise self.error
+        return generation
+
+
+def touch(path, seconds):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+
+@pytest.mark.parametrize("error, retried", [(FileNotFoundError("swapped"), True), (ValueError("bad csv"), False)])
+def test_failed_build_retried_only_for_os_errors(tmp_path, error, retried):
+    path = tmp_path / "benchmark.csv"
+    path.write_text("edition\n2025\n")
+    build = FlakyBuild(error)
+    manager = DataManager(path, build, interval=0)
+
+    touch(path, 1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        assert not manager.check()  # not settled yet
+        assert not manager.check()
+        assert not manager.check()
+    assert build.calls == (3 if retried else 2)
+    assert manager.current == 1
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+import copy
+
+import pytest
+from dash import Patch
+
+from utils.figures import figure_patch
+
+
+def trace(edition, case, showlegend=True):
+    return {"name": edition, "legendgroup": edition, "showlegend": showlegend, "x": [2024, 2025], "y": [1, 2],
+            "hovertemplate": f"edition={edition}<br>case={case}<extra></extra>"}
+
+
+def figure(*traces, **layout):
+    return {"data": list(traces), "layout": dict({"title": {"text": "Oil price"}}, **layout)}
+
+
+def apply(shown, patch):
+    # what the browser does with the operations of a Patch
+    result = copy.deepcopy(shown)
+    for operation in patch.to_plotly_json()["operations"]:
+        *path, last = operation["location"]
+        target = result
+        for key in path:
+            target = target[key]
+        params = operation["params"]
+        if operation["operation"] == "Delete":
+            del target[last]
+        elif operation["operation"] == "Insert":
+            target[last].insert(params["index"], params["value"])
+        elif operation["operation"] == "Assign":
+            target[last] = params["value"]
+        else:
+            raise AssertionError(operation)
+    return result
+
+
+@pytest.fixture
+def shown():
+    return figure(*(trace(edition, case) for edition in ("2023", "2025") for case in ("Reference", "High", "Low")))
+
+
+@pytest.mark.parametrize("previous", [None, {}, {"data": [], "layout": {}}])
+def test_nothing_shown_sends_the_figure(previous, shown):
+    assert figure_patch(previous, shown) is shown
+
+
+def test_same_figure_sends_an_empty_patch(shown):
+    patch = figure_patch(shown, copy.deepcopy(shown))
+    assert isinstance(patch, Patch)
+    assert patch.to_plotly_json()["operations"] == []
+
+
+def test_inserted_trace(shown):
+    new = copy.deepcopy(shown)
+    new["data"].insert(4, trace("2025", "Medium"))
+    patch = figure_patch(shown, new)
+    assert isinstance(patch, Patch)
+    operations = patch.to_plotly_json()["operations"]
+    assert [op["operation"] for op in operations] == ["Insert"]
+    assert operations[0]["params"]["index"] == 4
+    assert apply(shown, patch) == new
+
+
+def test_deleted_traces(shown):
+    new = copy.deepcopy(shown)
+    del new["data"][5]
+    del new["data"][1]
+    patch = figure_patch(shown, new)
+    assert isinstance(patch, Patch)
+    assert [op["operation"] for op in patch.to_plotly_json()["operations"]] == ["Delete", "Delete"]
+    assert apply(shown, patch) == new
+
+
+def test_deleted_first_trace_moves_the_legend(shown):
+    new = copy.deepcopy(shown)
+    del new["data"][0]
+    new["data"][0]["showlegend"] = True
+    new["data"][1]["showlegend"] = False
+    patch = figure_patch(shown, new)
+    assert isinstance(patch, Patch)
+    assert apply(shown, patch) == new
+
+
+def test_inserted_and_deleted_traces(shown):
+    new = copy.deepcopy(shown)
+    del new["data"][2]
+    new["data"].append(trace("2026", "Reference"))
+    patch = figure_patch(shown, new)
+    assert isinstance(patch, Patch)
+    assert apply(shown, patch) == new
+
+
+def test_reordered_traces_send_the_figure(shown):
+    new = copy.deepcopy(shown)
+    new["data"][0], new["data"][1] = new["data"][1], new["data"][0]
+    assert figure_patch(shown, new) is new
+
+
+def test_duplicate_traces_send_the_figure(shown):
+    new = copy.deepcopy(shown)
+    new["data"].append(copy.deepcopy(new["data"][0]))
+    assert figure_patch(shown, new) is new
+
+
+def test_too_many_changes_send_the_figure(shown):
+    new = copy.deepcopy(shown)
+    for t in new["data"][:4]:
+        t["y"] = [3, 4]
+    assert figure_patch(shown, new) is new
+    assert isinstance(figure_patch(shown, new, max_changed=1), Patch)
+
+
+def test_layout_keys(shown):
+    shown["layout"]["yaxis"] = {"tickprefix": "$"}
+    new = copy.deepcopy(shown)
+    new["layout"]["title"] = {"text": "Gas price"}
+    del new["layout"]["yaxis"]
+    new["layout"]["xaxis"] = {"range": [2024, 2030]}
+    patch = figure_patch(shown, new)
+    operations = {(op["operation"], op["location"][1]) for op in patch.to_plotly_json()["operations"]}
+    assert operations == {("Assign", "title"), ("Delete", "yaxis"), ("Assign", "xaxis")}
+    assert apply(shown, patch) == new
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+import pytest
+
+from utils.constants import case_name_labels_dict
+from utils.cube import BenchmarkCube
+from utils.figures import error_figure
+from utils.forecast_errors import ForecastErrors
+
+# (edition, case, year, value); the 2024 edition revises the 2021 actual and
+# has no actual for its own 2024 projection, 2023 has an actual of 0
+rows = [
+    ("2022", "ACTUAL", 2020, 100.0),
+    ("2022", "ACTUAL", 2021, 200.0),
+    ("2024", "ACTUAL", 2021, 250.0),
+    ("2024", "ACTUAL", 2022, 400.0),
+    ("2024", "ACTUAL", 2023, 0.0),
+    ("2022", "REFERENCE", 2022, 440.0),
+    ("2022", "REFERENCE", 2023, 10.0),
+    ("2024", "REFERENCE", 2024, 500.0),
+    ("2022", "HIGHMACRO", 2021, 275.0),
+    ("2022", "HIGHMACRO", 2022, 300.0),
+]
+
+
+def frame(rows):
+    edition, case_name, year, value = zip(*rows) if rows else ([], [], [], [])
+    return pd.DataFrame({
+        "edition": pd.Categorical(edition, ordered=True),
+        "case_name": pd.Categorical(case_name),
+        "case_name_labels": pd.Categorical([case_name_labels_dict[c] for c in case_name]),
+        "year": np.array(year, dtype=np.int16),
+        "value": np.array(value, dtype=np.float32),
+    })
+
+
+def errors_of(rows):
+    return ForecastErrors(BenchmarkCube(frame(rows), ["value"]))
+
+
+def records(table, columns):
+    labels = {name: str for name in ("edition", "case_name") if name in columns}
+    return list(table[columns].astype(labels).itertuples(index=False, name=None))
+
+
+def test_detail_on_demand():
+    errors = errors_of(rows)
+    assert "detail" not in vars(errors)
+    assert errors.detail is errors.detail
+    assert list(errors.table("detail", "value", ["REFERENCE"])["year"]) == [2022, 2023]
+
+
+def test_detail():
+    detail = errors_of(rows).detail
+    assert records(detail, ["edition", "case_name", "horizon", "year", "projected", "actual", "error"]) == [
+        ("2022", "HIGHMACRO", -1, 2021, 275, 250, 25),
+        ("2022", "HIGHMACRO", 0, 2022, 300, 400, -100),
+        ("2022", "REFERENCE", 0, 2022, 440, 400, 40),
+        ("2022", "REFERENCE", 1, 2023, 10, 0, 10),
+    ]
+    # no percent error against an actual of 0
+    np.testing.assert_allclose(detail["pct_error"], [10, -25, 10, np.nan])
+
+
+def test_by_edition():
+    by_edition = errors_of(rows).by_edition
+    # the 2024 projection has no actual yet, so that edition has no row
+    assert records(by_edition, ["edition", "case_name", "n"]) == [("2022", "HIGHMACRO", 2), ("2022", "REFERENCE", 2)]
+    np.testing.assert_allclose(by_edition["mape"], [17.5, 10], rtol=1e-6)
+    np.testing.assert_allclose(by_edition["bias"], [-7.5, 10], rtol=1e-6)
+    np.testing.assert_allclose(by_edition["rmse"], [np.sqrt((25**2 + 100**2) / 2), np.sqrt((40**2 + 10**2) / 2)],
+                               rtol=1e-6)
+    assert list(by_edition["case_name_labels"].astype(str)) == ["High Economic Growth", "Reference case"]
+
+
+def test_by_horizon():
+    by_horizon = errors_of(rows).by_horizon
+    assert records(by_horizon, ["case_name", "horizon", "n"]) == [
+        ("HIGHMACRO", -1, 1), ("HIGHMACRO", 0, 1), ("REFERENCE", 0, 1), ("REFERENCE", 1, 1)]
+    np.testing.assert_allclose(by_horizon["mape"], [10, 25, 10, np.nan], rtol=1e-6)
+    np.testing.assert_allclose(by_horizon["bias"], [10, -25, 10, np.nan], rtol=1e-6)
+    np.testing.assert_allclose(by_horizon["rmse"], [25, 100, 40, 10], rtol=1e-6)
+
+
+def test_table():
+    errors = errors_of(rows)
+    assert list(errors.table("by_horizon", "value", ["REFERENCE"])["horizon"]) == [0, 1]
+    assert errors.table("by_edition", "missing").empty
+
+
+@pytest.mark.parametrize("case_names", [["ACTUAL"], ["REFERENCE", "HIGHMACRO"]], ids=["only-actual", "no-actual"])
+def test_no_errors_to_compute(case_names):
+    errors = errors_of([row for row in rows if row[1] in case_names])
+    full = errors_of(rows)
+    for name in ("detail", "by_edition", "by_horizon"):
+        table = getattr(errors, name)
+        assert table.empty
+        assert list(table.columns) == list(getattr(full, name).columns)
+        assert table.dtypes.astype(str).to_dict() == getattr(full, name).dtypes.astype(str).to_dict()
+
+    by_horizon = errors.table("by_horizon", "value", case_names)
+    assert by_horizon.empty
+    figure = error_figure(by_horizon, "mape", "value", "Mean absolute percent error", go.layout.Template())
+    assert figure.data == ()
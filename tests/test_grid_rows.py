@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.grid_rows import GridRowModel, filter_mask
+from utils.series_index import SeriesIndex
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "edition": pd.Categorical(["2023", "2023", "2023", "2025", "2025"]),
+        "case_name": pd.Categorical(["REFERENCE", "REFERENCE", "HIGHMACRO", "REFERENCE", "HIGHMACRO"]),
+        "case_name_labels": pd.Categorical(["Reference case", "Reference case", "High Economic Growth",
+                                            "Reference case", "High Economic Growth"]),
+        "year": np.array([2024, 2025, 2025, 2025, 2026], dtype=np.int16),
+        "value": np.array([1.5, 2.5, np.nan, 4.0, 5.0], dtype=np.float32),
+    })
+
+
+@pytest.fixture
+def model(frame):
+    return GridRowModel(frame, SeriesIndex(frame), list(frame.columns))
+
+
+def number(kind, value=None, **extra):
+    return {"filterType": "number", "type": kind, "filter": value, **extra}
+
+
+@pytest.mark.parametrize("condition, expected", [
+    (number("equals", 2.5), [False, True, False, False, False]),
+    (number("greaterThan", 2.5), [False, False, False, True, True]),
+    (number("lessThanOrEqual", 2.5), [True, True, False, False, False]),
+    (number("inRange", 2, filterTo=4), [False, True, False, True, False]),
+    ({"filterType": "number", "type": "blank"}, [False, False, True, False, False]),
+    ({"filterType": "number", "type": "notBlank"}, [True, True, False, True, True]),
+])
+def test_number_conditions(frame, condition, expected):
+    assert filter_mask(frame, {"value": condition}).tolist() == expected
+
+
+def test_float32_values_compare_as_shown():
+    frame = pd.DataFrame({"value": np.array([61.057], dtype=np.float32)})
+    assert filter_mask(frame, {"value": number("equals", 61.057)}).tolist() == [True]
+
+
+@pytest.mark.parametrize("condition", [
+    number("equals"),
+    number("inRange", 2),
+    number("inRange", None, filterTo=4),
+    {"filterType": "text", "type": "equals", "filter": None},
+])
+def test_incomplete_conditions_filter_nothing(frame, condition):
+    column = "case_name_labels" if condition["filterType"] == "text" else "value"
+    assert filter_mask(frame, {column: condition}).all()
+
+
+def test_text_conditions(frame):
+    contains = {"filterType": "text", "type": "contains", "filter": "GROWTH"}
+    starts = {"filterType": "text", "type": "startsWith", "filter": "ref"}
+    assert filter_mask(frame, {"case_name_labels": contains}).tolist() == [False, False, True, False, True]
+    assert filter_mask(frame, {"case_name_labels": starts}).tolist() == [True, True, False, True, False]
+
+
+def test_combined_conditions(frame):
+    low, high = number("lessThan", 2), number("greaterThan", 4.5)
+    either = {"filterType": "number", "operator": "OR", "conditions": [low, high]}
+    both = {"filterType": "number", "operator": "AND", "conditions": [low, high]}
+    typing = {"filterType": "number", "operator": "OR", "conditions": [low, number("greaterThan")]}
+    assert filter_mask(frame, {"value": either}).tolist() == [True, False, False, False, True]
+    assert not filter_mask(frame, {"value": both}).any()
+    assert filter_mask(frame, {"value": typing}).tolist() == [True, False, False, False, False]
+
+
+def test_unknown_filter_column_is_ignored(frame):
+    assert filter_mask(frame, {"missing": number("equals", 1)}).all()
+
+
+def rows(model, filter_model=None, sort_model=None, cases=("REFERENCE", "HIGHMACRO"), start=0, end=100):
+    request = {"startRow": start, "endRow": end, "filterModel": filter_model, "sortModel": sort_model}
+    return model.rows(request, list(cases), [2024, 2026])
+
+
+def test_rows_are_filtered_and_counted(model):
+    response = rows(model, {"value": number("greaterThan", 2)})
+    assert response["rowCount"] == 3
+    assert [row["value"] for row in response["rowData"]] == [2.5, 4.0, 5.0]
+
+
+def test_rows_sorted_with_blanks_last(model):
+    response = rows(model, sort_model=[{"colId": "value", "sort": "desc"}])
+    values = [row["value"] for row in response["rowData"]]
+    assert values[:4] == [5.0, 4.0, 2.5, 1.5] and np.isnan(values[4])
+
+
+def test_rows_sorted_on_several_columns(model):
+    response = rows(model, sort_model=[{"colId": "year", "sort": "desc"}, {"colId": "edition", "sort": "asc"}])
+    assert [(row["year"], row["edition"]) for row in response["rowData"]][:3] == [(2026, "2025"), (2025, "2023"),
+                                                                                 (2025, "2023")]
+
+
+def test_unknown_sort_column_is_ignored(model):
+    keys = lambda response: [(row["edition"], row["case_name"], row["year"]) for row in response["rowData"]]
+    assert keys(rows(model, sort_model=[{"colId": "missing", "sort": "desc"}])) == keys(rows(model))
+
+
+def test_rows_follow_the_case_selection_and_block(model):
+    response = rows(model, cases=["REFERENCE"], start=1, end=2)
+    assert response["rowCount"] == 3
+    assert len(response["rowData"]) == 1
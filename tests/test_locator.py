@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+from utils import locator
+from utils.locator import find_data_file
+
+name = "eia-aeo-mer-benchmark-test.csv"
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "root"
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "a" / "b" / name).write_text("edition\n2025\n")
+    return root
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return tmp_path / "manifest.json"
+
+
+def searches(monkeypatch):
+    calls = []
+    search = locator.search_data_file
+    monkeypatch.setattr(locator, "search_data_file", lambda *args, **kwargs: calls.append(args) or search(*args, **kwargs))
+    return calls
+
+
+def test_found_and_remembered(tree, manifest, monkeypatch):
+    calls = searches(monkeypatch)
+    path = find_data_file(name, roots=[tree], manifest=manifest)
+    assert path == (tree / "a" / "b" / name).resolve()
+    assert find_data_file(name, roots=[tree], manifest=manifest) == path
+    assert len(calls) == 1
+
+    entry, = json.loads(manifest.read_text()).values()
+    stat = path.stat()
+    assert entry == {"path": str(path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def test_changed_file_searched_again(tree, manifest, monkeypatch):
+    calls = searches(monkeypatch)
+    path = find_data_file(name, roots=[tree], manifest=manifest)
+    path.write_text("edition\n2025\n2026\n")
+    assert find_data_file(name, roots=[tree], manifest=manifest) == path
+    assert len(calls) == 2
+    # the entry now describes the new file and is reused again
+    assert find_data_file(name, roots=[tree], manifest=manifest) == path
+    assert len(calls) == 2
+
+
+def test_replaced_file_searched_again(tree, manifest, monkeypatch):
+    calls = searches(monkeypatch)
+    path = find_data_file(name, roots=[tree], manifest=manifest)
+    os.remove(path)
+    (tree / name).write_text("edition\n2025\n")
+    assert find_data_file(name, roots=[tree], manifest=manifest) == (tree / name).resolve()
+    assert len(calls) == 2
+
+
+def test_missing_file(tree, manifest):
+    with pytest.raises(FileNotFoundError):
+        find_data_file("other.csv", roots=[tree], manifest=manifest)